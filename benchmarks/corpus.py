@@ -0,0 +1,223 @@
+""" This module generates synthetic corpora to benchmark the comparison of files
+
+It generates random texts from a fixed pseudo vocabulary.
+It copies runs of words from earlier texts at a controlled plagiarism rate.
+It writes texts as txt, docx, odt and pdf files without any third party library.
+
+"""
+
+import zipfile
+from os import makedirs, path
+from random import Random
+from typing import List, Sequence
+from xml.sax.saxutils import escape
+
+FORMATS = ("txt", "docx", "odt", "pdf")
+
+# Words written per line of pdf pages and lines per page
+PDF_LINE_WORDS = 12
+PDF_PAGE_LINES = 50
+
+SYLLABLES = ["ka", "lo", "mi", "nu", "pe", "ra", "si", "to", "va", "ze", "bor", "dan", "fel", "gir", "hus", "jet"]
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    "</Types>"
+)
+DOCX_RELATIONSHIPS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    "</Relationships>"
+)
+ODT_MIMETYPE = "application/vnd.oasis.opendocument.text"
+ODT_MANIFEST = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0" manifest:version="1.2">'
+    f'<manifest:file-entry manifest:full-path="/" manifest:media-type="{ODT_MIMETYPE}"/>'
+    '<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    "</manifest:manifest>"
+)
+
+
+def get_vocabulary(size: int = 2000, seed: int = 0) -> List[str]:
+    """Return size distinct pseudo words made of random syllables"""
+
+    rng = Random(seed)
+    words: List[str] = []
+    seen = set()
+
+    while len(words) < size:
+        word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+
+    return words
+
+
+def generate_texts(
+    num_files: int, words_per_file: int, plagiarism_rate: float, seed: int = 0, run_size: int = 20
+) -> List[List[str]]:
+    """Return num_files words lists, a plagiarism_rate share of each one copied from earlier ones
+
+    The first text is random. Each other text is made of runs of run_size words, each run is
+    either copied from a random position of a random earlier text, with probability
+    plagiarism_rate, or drawn at random from the vocabulary.
+
+    """
+
+    rng = Random(seed)
+    vocabulary = get_vocabulary(seed=seed)
+    texts: List[List[str]] = []
+
+    for _ in range(num_files):
+        words: List[str] = []
+
+        while len(words) < words_per_file:
+            size = min(run_size, words_per_file - len(words))
+            sources = [source for source in texts if len(source) >= size]
+
+            if sources and rng.random() < plagiarism_rate:
+                source = rng.choice(sources)
+                start = rng.randrange(len(source) - size + 1)
+                words.extend(source[start : start + size])
+            else:
+                words.extend(rng.choice(vocabulary) for _ in range(size))
+
+        texts.append(words)
+
+    return texts
+
+
+def get_paragraphs(words: List[str], paragraph_size: int = 100) -> List[str]:
+    """Return words joined in paragraphs of paragraph_size words"""
+
+    return [" ".join(words[ind : ind + paragraph_size]) for ind in range(0, len(words), paragraph_size)]
+
+
+def write_txt(file_path: str, words: List[str]) -> None:
+    """Write words as a txt file, one paragraph per line"""
+
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(get_paragraphs(words)) + "\n")
+
+
+def write_docx(file_path: str, words: List[str]) -> None:
+    """Write words as a minimal docx file, one paragraph per hundred words"""
+
+    # Paragraphs end with a space so that words of consecutive paragraphs stay apart once tags are removed
+    body = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(paragraph)} </w:t></w:r></w:p>'
+        for paragraph in get_paragraphs(words)
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f"<w:body>{body}</w:body></w:document>"
+    )
+
+    with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        docx.writestr("_rels/.rels", DOCX_RELATIONSHIPS)
+        docx.writestr("word/document.xml", document)
+
+
+def write_odt(file_path: str, words: List[str]) -> None:
+    """Write words as a minimal odt file, one paragraph per hundred words"""
+
+    body = "".join(f"<text:p>{escape(paragraph)} </text:p>" for paragraph in get_paragraphs(words))
+    content = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+        'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" office:version="1.2">'
+        f"<office:body><office:text>{body}</office:text></office:body></office:document-content>"
+    )
+
+    with zipfile.ZipFile(file_path, "w", zipfile.ZIP_DEFLATED) as odt:
+        # The mimetype must be the first entry and stay uncompressed
+        odt.writestr("mimetype", ODT_MIMETYPE, compress_type=zipfile.ZIP_STORED)
+        odt.writestr("META-INF/manifest.xml", ODT_MANIFEST)
+        odt.writestr("content.xml", content)
+
+
+def write_pdf(file_path: str, words: List[str]) -> None:
+    """Write words as a minimal pdf file in Helvetica, PDF_PAGE_LINES lines of PDF_LINE_WORDS words per page
+
+    Words must be ASCII, which is the case of generated words.
+
+    """
+
+    lines = [" ".join(words[ind : ind + PDF_LINE_WORDS]) for ind in range(0, len(words), PDF_LINE_WORDS)]
+    pages = [lines[ind : ind + PDF_PAGE_LINES] for ind in range(0, len(lines), PDF_PAGE_LINES)] or [[]]
+
+    # Objects 1 to 3 are the catalog, the pages tree and the font, then a page and its content per page
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids ["
+        + b" ".join(f"{4 + 2 * ind} 0 R".encode("ascii") for ind in range(len(pages)))
+        + f"] /Count {len(pages)} >>".encode("ascii"),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+
+    for ind, page_lines in enumerate(pages):
+        text_lines = "".join(f"({line}) Tj T* " for line in page_lines)
+        stream = f"BT /F1 10 Tf 14 TL 50 770 Td {text_lines}ET".encode("ascii")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Resources << /Font << /F1 3 0 R >> >> "
+            f"/Contents {5 + 2 * ind} 0 R >>".encode("ascii")
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode("ascii") + stream + b"\nendstream")
+
+    content = bytearray(b"%PDF-1.4\n")
+    offsets = []
+
+    for number, pdf_object in enumerate(objects, start=1):
+        offsets.append(len(content))
+        content += f"{number} 0 obj\n".encode("ascii") + pdf_object + b"\nendobj\n"
+
+    xref_offset = len(content)
+    content += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii")
+    content += b"".join(f"{offset:010d} 00000 n \n".encode("ascii") for offset in offsets)
+    content += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode("ascii")
+
+    with open(file_path, "wb") as file:
+        file.write(content)
+
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "odt": write_odt, "pdf": write_pdf}
+
+
+def generate_corpus(
+    directory: str,
+    num_files: int,
+    words_per_file: int,
+    plagiarism_rate: float,
+    formats: Sequence[str] = FORMATS,
+    seed: int = 0,
+) -> List[str]:
+    """Write a corpus of generated texts in directory and return the paths of its files
+
+    Formats are assigned to files in turn, so a corpus holds about as many files of each format.
+
+    """
+
+    if not path.exists(directory):
+        makedirs(directory)
+
+    files_paths = []
+
+    for ind, words in enumerate(generate_texts(num_files, words_per_file, plagiarism_rate, seed)):
+        extension = formats[ind % len(formats)]
+        file_path = path.join(directory, f"file_{ind:04d}.{extension}")
+        WRITERS[extension](file_path, words)
+        files_paths.append(file_path)
+
+    return files_paths
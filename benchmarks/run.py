@@ -0,0 +1,211 @@
+""" This script times each stage of the comparison of a generated corpus
+
+It generates a corpus with controlled sizes and plagiarism rate in a temporary directory.
+It times the startup of the command line, words extraction per format, alignment of pairs,
+comparison pages and the results table.
+It measures the peak memory allocated by words extraction per format.
+It saves timings as a JSON baseline and compares them with a previous baseline.
+
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+from functools import partial
+from os import makedirs, path
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.corpus import FORMATS, generate_corpus
+from scripts.html_writing import papers_comparison, results_to_html
+from scripts.processing_files import file_extension_call
+from scripts.similarity import ENGINES
+from scripts.utils import get_pair_index, get_pairs
+from scripts.vocabulary import Vocabulary
+
+
+def parse_options():
+    """Parse command-line arguments of the benchmark"""
+
+    parser = argparse.ArgumentParser(description="time each stage of the comparison of a generated corpus")
+    parser.add_argument("--files", type=int, default=8, help="number of generated files (default=8)")
+    parser.add_argument("--words", type=int, default=2000, help="number of words per file (default=2000)")
+    parser.add_argument(
+        "--plagiarism_rate",
+        type=float,
+        default=0.3,
+        help="share of each file copied from earlier files, between 0 and 1 (default=0.3)",
+    )
+    parser.add_argument(
+        "--formats", nargs="+", choices=FORMATS, default=list(FORMATS), help="formats of generated files (default=all)"
+    )
+    parser.add_argument("--engine", choices=list(ENGINES), default="difflib", help="alignment engine (default=difflib)")
+    parser.add_argument("-s", "--block_size", type=int, default=2, help="minimum size of matching blocks (default=2)")
+    parser.add_argument("--repeat", type=int, default=3, help="number of runs, the fastest is kept (default=3)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated corpus (default=0)")
+    parser.add_argument("--save", type=str, help="write timings to this JSON baseline file")
+    parser.add_argument("--baseline", type=str, help="compare timings with this JSON baseline file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="relative slowdown of a stage over the baseline reported as a regression (default=0.25)",
+    )
+
+    return parser.parse_args()
+
+
+def time_stage(function: Callable[[], object], repeat: int) -> float:
+    """Return the shortest wall time in seconds of repeat calls to function"""
+
+    timings = []
+
+    for _ in range(max(1, repeat)):
+        start = perf_counter()
+        function()
+        timings.append(perf_counter() - start)
+
+    return min(timings)
+
+
+def measure_peak_memory(function: Callable[[], object]) -> int:
+    """Return peak memory in bytes allocated by Python objects during a call to function
+
+    Memory mapped files are not Python allocations, their pages are not counted.
+
+    """
+
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def extract_all(files_paths: List[str]) -> List[list]:
+    """Return words lists of files"""
+
+    return [file_extension_call(file) for file in files_paths]
+
+
+def run_benchmark(args: argparse.Namespace, directory: str) -> Tuple[Dict[str, float], Dict[str, int]]:
+    """Return wall time in seconds of each stage and peak memory in bytes of each extraction stage
+
+    Stages compare a corpus generated in directory.
+
+    """
+
+    timings: Dict[str, float] = {
+        # Imports of the command line before any file is read, paid by every run
+        "startup": time_stage(
+            partial(subprocess.run, [sys.executable, "-m", "scripts.main", "--help"], check=True, capture_output=True),
+            args.repeat,
+        )
+    }
+
+    files_paths = generate_corpus(
+        path.join(directory, "corpus"), args.files, args.words, args.plagiarism_rate, args.formats, args.seed
+    )
+    results_dir = path.join(directory, "results")
+    makedirs(results_dir)
+
+    peak_memory: Dict[str, int] = {}
+
+    for extension in args.formats:
+        format_files = [file for file in files_paths if file.endswith(f".{extension}")]
+        if format_files:
+            timings[f"extraction_{extension}"] = time_stage(partial(extract_all, format_files), args.repeat)
+            peak_memory[f"extraction_{extension}"] = measure_peak_memory(partial(extract_all, format_files))
+
+    words_lists = extract_all(files_paths)
+    vocabulary = Vocabulary()
+    processed_files: list = [vocabulary.encode(words) for words in words_lists]
+    filenames = [path.splitext(path.basename(file))[0] for file in files_paths]
+    pairs = get_pairs(len(processed_files))
+    alignment = ENGINES[args.engine]
+
+    timings["alignment"] = time_stage(
+        lambda: [alignment(processed_files[i], processed_files[j], args.block_size) for i, j in pairs], args.repeat
+    )
+
+    alignments = [alignment(processed_files[i], processed_files[j], args.block_size) for i, j in pairs]
+    scores: List[List[float]] = [[-1] * len(processed_files) for _ in range(len(processed_files))]
+    for (i, j), (score, _) in zip(pairs, alignments):
+        scores[i][j] = scores[j][i] = score
+
+    def write_pages() -> None:
+        for (i, j), (_, matching_blocks) in zip(pairs, alignments):
+            papers_comparison(
+                results_dir,
+                get_pair_index(i, j, len(filenames)),
+                words_lists[i],
+                words_lists[j],
+                (filenames[i], filenames[j]),
+                args.block_size,
+                matching_blocks,
+            )
+
+    timings["comparison_pages"] = time_stage(write_pages, args.repeat)
+    timings["results_table"] = time_stage(
+        lambda: results_to_html(scores, filenames, path.join(results_dir, "_results.html")), args.repeat
+    )
+
+    return timings, peak_memory
+
+
+def compare_with_baseline(timings: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Return names of the stages slower than their baseline time by more than tolerance"""
+
+    return [
+        stage for stage, seconds in timings.items() if stage in baseline and seconds > baseline[stage] * (1 + tolerance)
+    ]
+
+
+def main() -> None:
+    """Run the benchmark, print timings and exit with status 1 when a stage regressed over the baseline"""
+
+    args = parse_options()
+
+    with tempfile.TemporaryDirectory() as directory:
+        timings, peak_memory = run_benchmark(args, directory)
+
+    settings = {
+        name: getattr(args, name)
+        for name in ("files", "words", "plagiarism_rate", "formats", "engine", "block_size", "repeat", "seed")
+    }
+    report = {"settings": settings, "python": platform.python_version(), "stages": timings, "peak_memory": peak_memory}
+
+    baseline_stages: Dict[str, float] = {}
+    if args.baseline is not None:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("settings") != settings:
+            print("Warning: baseline was recorded with other settings, timings may not be comparable")
+        baseline_stages = baseline["stages"]
+
+    for stage, seconds in timings.items():
+        line = f"{stage:<20}{seconds:>10.4f} s"
+        if stage in baseline_stages:
+            line += f"{seconds / baseline_stages[stage]:>8.2f}x baseline" if baseline_stages[stage] else ""
+        print(line)
+
+    for stage, size in peak_memory.items():
+        print(f"{stage:<20}{size / 2**20:>10.2f} MiB peak")
+
+    if args.save is not None:
+        with open(args.save, "w", encoding="utf-8") as save_file:
+            json.dump(report, save_file, indent=2)
+
+    regressions = compare_with_baseline(timings, baseline_stages, args.tolerance)
+    if regressions:
+        print(f"Regressions over {args.tolerance:.0%} tolerance: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
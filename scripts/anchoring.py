@@ -0,0 +1,147 @@
+""" This module aligns long texts window by window between anchors
+
+It finds n-grams of words appearing exactly once in each text, the anchors.
+It keeps the longest chain of anchors in the same order in both texts.
+It aligns the windows left between consecutive anchors separately, with a bounded cost each.
+
+"""
+
+import difflib
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from scripts.suffix_automaton import get_suffix_matching_blocks
+
+# Number of words of an anchor, shorter runs of words shared once are found by window alignments
+ANCHOR_SIZE = 8
+
+# Largest product of the sizes of both sides of a window aligned with the Sequence Matcher,
+# larger windows are aligned with the suffix automaton in near linear time
+MAX_WINDOW_CELLS = 2000 * 2000
+
+
+def get_unique_ngrams(words_list: list, size: int) -> Dict[tuple, int]:
+    """Return position of each n-gram of size words in words_list, -1 for n-grams appearing more than once"""
+
+    positions: Dict[tuple, int] = {}
+
+    for position, ngram in enumerate(zip(*(words_list[shift:] for shift in range(size)))):
+        positions[ngram] = -1 if ngram in positions else position
+
+    return positions
+
+
+def get_anchors(words_list1: list, words_list2: list, size: int = ANCHOR_SIZE) -> List[Tuple[int, int]]:
+    """Return positions (i, j) of n-grams of size words appearing once in each words list, by increasing i"""
+
+    positions2 = get_unique_ngrams(words_list2, size)
+    anchors = []
+
+    for ngram, i in get_unique_ngrams(words_list1, size).items():
+        j = positions2.get(ngram, -1)
+        if i >= 0 and j >= 0:
+            anchors.append((i, j))
+
+    return sorted(anchors)
+
+
+def select_anchors(anchors: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Return the longest chain of anchors increasing in both texts, from anchors increasing in the first one
+
+    The chain is a longest increasing subsequence of the positions in the second text, found by
+    patience sorting in O(k log k) for k anchors.
+
+    """
+
+    tails: List[int] = []  # Last position j of the best chain of each length
+    tails_anchors: List[int] = []  # Index of the anchor ending the best chain of each length
+    previous = [-1] * len(anchors)  # Index of the anchor before each anchor in its chain
+
+    for ind, (_, j) in enumerate(anchors):
+        length = bisect_left(tails, j)
+        previous[ind] = tails_anchors[length - 1] if length else -1
+
+        if length == len(tails):
+            tails.append(j)
+            tails_anchors.append(ind)
+        else:
+            tails[length], tails_anchors[length] = j, ind
+
+    chain = []
+    ind = tails_anchors[-1] if tails_anchors else -1
+    while ind >= 0:
+        chain.append(anchors[ind])
+        ind = previous[ind]
+
+    return chain[::-1]
+
+
+def get_anchor_blocks(anchors: List[Tuple[int, int]], size: int) -> List[Tuple[int, int, int]]:
+    """Return non overlapping blocks (i, j, size) covered by a chain of anchors of size words
+
+    Overlapping anchors on the same diagonal are merged in one block, anchors overlapping the
+    previous block on another diagonal are dropped.
+
+    """
+
+    blocks: List[Tuple[int, int, int]] = []
+
+    for i, j in anchors:
+        if blocks:
+            block_i, block_j, block_size = blocks[-1]
+            if i - j == block_i - block_j and i <= block_i + block_size:
+                blocks[-1] = (block_i, block_j, i + size - block_i)
+                continue
+            if i < block_i + block_size or j < block_j + block_size:
+                continue
+
+        blocks.append((i, j, size))
+
+    return blocks
+
+
+def align_window(words_list1: list, words_list2: list) -> List[Tuple[int, int, int]]:
+    """Return matching blocks (i, j, size) of a window, without the final sentinel block"""
+
+    if len(words_list1) * len(words_list2) <= MAX_WINDOW_CELLS:
+        # Windows are small enough for no word to be ignored as junk
+        blocks = difflib.SequenceMatcher(a=words_list1, b=words_list2, autojunk=False).get_matching_blocks()
+    else:
+        blocks = get_suffix_matching_blocks(words_list1, words_list2)
+
+    return [(i, j, size) for i, j, size in blocks if size]
+
+
+def get_anchored_matching_blocks(words_list1: list, words_list2: list, anchor_size: int = ANCHOR_SIZE) -> list:
+    """Return matching blocks between two words lists aligned window by window between anchors
+
+    Blocks are difflib Match triples (a, b, size), increasing in both a and b, followed by the
+    sentinel Match(len(a), len(b), 0) as returned by get_matching_blocks. Anchors are matched
+    as a whole and each window between them is aligned on its own, so memory and time depend
+    on the size of the windows instead of the product of the sizes of the texts.
+
+    """
+
+    anchor_blocks = get_anchor_blocks(select_anchors(get_anchors(words_list1, words_list2, anchor_size)), anchor_size)
+    blocks: List[Tuple[int, int, int]] = []
+    low_i = low_j = 0
+
+    for i, j, size in anchor_blocks + [(len(words_list1), len(words_list2), 0)]:
+        if i > low_i and j > low_j:
+            window_blocks = align_window(words_list1[low_i:i], words_list2[low_j:j])
+            blocks.extend(
+                (block_i + low_i, block_j + low_j, block_size) for block_i, block_j, block_size in window_blocks
+            )
+        if size:
+            blocks.append((i, j, size))
+        low_i, low_j = i + size, j + size
+
+    # Merge adjacent blocks as difflib does
+    merged: List[Tuple[int, int, int]] = []
+    for i, j, size in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+
+    return [difflib.Match(*block) for block in merged] + [difflib.Match(len(words_list1), len(words_list2), 0)]
@@ -0,0 +1,264 @@
+""" This module compares files with an archive of files indexed on disk
+
+It extracts files of an archive directory and stores their winnowed fingerprints in an SQLite inverted index.
+It only extracts new or changed files when the archive is indexed again.
+It finds the archived files sharing the most fingerprints with a queried file from the index alone.
+It aligns the queried file with these files only and writes their comparison pages.
+
+"""
+
+import sqlite3
+from argparse import Namespace
+from datetime import datetime
+from multiprocessing import cpu_count
+from os import listdir, makedirs, path, remove
+from typing import Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from scripts.cache import WordsCache
+from scripts.html_utils import writing_results
+from scripts.html_writing import matches_to_html, papers_comparison
+from scripts.processing_files import extract_files, extract_words, try_get_cache_key
+from scripts.similarity import ENGINES
+from scripts.utils import get_filename
+from scripts.vocabulary import Vocabulary
+from scripts.winnowing import get_stable_fingerprints
+
+INDEX_FILE = "index.sqlite"
+INDEX_VERSION = 2
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, key TEXT NOT NULL, fingerprints INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fingerprints (
+    hash INTEGER NOT NULL, document INTEGER NOT NULL, PRIMARY KEY (hash, document)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS fingerprints_document ON fingerprints (document);
+"""
+
+
+class ArchiveIndex:
+    """Inverted index from winnowed fingerprints to archived files, stored in an SQLite database
+
+    Archived files are identified by their file name. A file is unchanged when its words cache
+    key, made of its content hash and extractor version, is the same as when it was indexed.
+    Words of archived files are kept next to the database to write comparison pages. The
+    settings of the fingerprints are stored with the index, all files are indexed again when
+    they change.
+
+    """
+
+    def __init__(self, directory: str) -> None:
+        if not path.exists(directory):
+            makedirs(directory)
+
+        self.directory = directory
+        self.connection = sqlite3.connect(path.join(directory, INDEX_FILE))
+        # Each indexed file is committed on its own, the write ahead log makes these commits cheap
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(INDEX_SCHEMA)
+        self.words = WordsCache(path.join(directory, "words"), 0)  # Only trimmed by update, never evicted
+
+    def get_settings(self) -> Dict[str, int]:
+        """Return settings of the fingerprints of the index, empty for a new index"""
+
+        return dict(self.connection.execute("SELECT name, value FROM settings"))
+
+    def get_documents(self) -> Dict[str, Tuple[int, str]]:
+        """Return identifier and words cache key of each archived file name"""
+
+        return {
+            name: (doc_id, key) for doc_id, name, key in self.connection.execute("SELECT id, name, key FROM documents")
+        }
+
+    def update(self, files_paths: List[str], settings: Dict[str, int], jobs: int = 1, pdf_max_pages: int = 0) -> int:
+        """Index new and changed files of files_paths, drop other archived files and return the number of indexed files
+
+        settings are the kgram_size and window_size of the fingerprints. Files that cannot be
+        processed are reported and left out of the index.
+
+        """
+
+        settings = {"version": INDEX_VERSION, **settings}
+
+        with self.connection:
+            if self.get_settings() != settings:  # Fingerprints made with other settings cannot be compared
+                self.connection.execute("DELETE FROM fingerprints")
+                self.connection.execute("DELETE FROM documents")
+                self.connection.execute("DELETE FROM settings")
+                self.connection.executemany("INSERT INTO settings VALUES (?, ?)", settings.items())
+
+        keys = {}
+        for file in files_paths:
+            key, error = try_get_cache_key(file, pdf_max_pages)
+            if key is not None:
+                keys[path.basename(file)] = key
+            else:  # Dropped from the index like a removed file
+                print(f"Skipping {path.basename(file)}: {error}")
+
+        documents = self.get_documents()
+        # Archived files removed from files_paths or changed since they were indexed
+        stale = {name: doc_id for name, (doc_id, key) in documents.items() if keys.get(name) != key}
+
+        with self.connection:
+            for doc_id in stale.values():
+                self.connection.execute("DELETE FROM fingerprints WHERE document = ?", (doc_id,))
+                self.connection.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+
+        to_index = [
+            file
+            for file in files_paths
+            if path.basename(file) in keys and (path.basename(file) not in documents or path.basename(file) in stale)
+        ]
+        indexed = 0
+
+        for file, words, error in tqdm(
+            extract_files(to_index, jobs, None, pdf_max_pages), total=len(to_index), desc="Indexing Files"
+        ):
+            if error is not None:
+                tqdm.write(f"Skipping {path.basename(file)}: {error}")
+                continue
+
+            key = keys[path.basename(file)]
+            fingerprints = get_stable_fingerprints(words, settings["kgram_size"], settings["window_size"])
+            self.words.put_words(key, words)  # Stored first, so that every archived file has its words
+
+            with self.connection:
+                cursor = self.connection.execute(
+                    "INSERT INTO documents (name, key, fingerprints) VALUES (?, ?, ?)",
+                    (path.basename(file), key, len(fingerprints)),
+                )
+                self.connection.executemany(
+                    "INSERT INTO fingerprints VALUES (?, ?)",
+                    ((fingerprint, cursor.lastrowid) for fingerprint in fingerprints),
+                )
+            indexed += 1
+
+        kept_keys = {key for _, key in self.get_documents().values()}
+        for name in listdir(self.words.directory):
+            if name.endswith(self.words.file_extension) and name[: -len(self.words.file_extension)] not in kept_keys:
+                remove(path.join(self.words.directory, name))
+
+        return indexed
+
+    def query(self, words: list, top: int = 10) -> List[Tuple[str, str, float]]:
+        """Return (name, words cache key, similarity percentage) of the top archived files most similar to words
+
+        The percentage is twice the number of shared fingerprints over the total number of
+        fingerprints of both files, as fingerprints_scores computes it. Only archived files
+        sharing fingerprints with words are looked up, through the index of fingerprints.
+
+        """
+
+        settings = self.get_settings()
+        fingerprints = get_stable_fingerprints(words, settings["kgram_size"], settings["window_size"])
+
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS query (hash INTEGER PRIMARY KEY)")
+        self.connection.execute("DELETE FROM query")
+        self.connection.executemany("INSERT INTO query VALUES (?)", ((fingerprint,) for fingerprint in fingerprints))
+
+        return self.connection.execute(
+            """
+            SELECT documents.name, documents.key, ROUND(200.0 * COUNT(*) / (documents.fingerprints + ?), 3) AS score
+            FROM query
+            JOIN fingerprints ON fingerprints.hash = query.hash
+            JOIN documents ON documents.id = fingerprints.document
+            GROUP BY documents.id
+            ORDER BY score DESC, documents.name
+            LIMIT ?
+            """,
+            (len(fingerprints), top),
+        ).fetchall()
+
+    def get_words(self, key: str) -> Optional[list]:
+        """Return words of the archived file with words cache key, None if they are missing"""
+
+        return self.words.get_words(key)
+
+    def close(self) -> None:
+        """Close the database"""
+
+        self.connection.close()
+
+
+def index_archive(args: Namespace) -> None:
+    """Index files of the input directory in the index directory given with --index_archive, from parse_options"""
+
+    archive_dir = path.abspath(args.in_dir)
+    files_paths = [
+        path.join(archive_dir, f)
+        for f in sorted(listdir(archive_dir))
+        if path.isfile(path.join(archive_dir, f)) and f.endswith(("txt", "pdf", "docx", "odt"))
+    ]
+
+    index = ArchiveIndex(args.index_archive)
+    indexed = index.update(
+        files_paths,
+        {"kgram_size": args.kgram_size, "window_size": args.window_size},
+        args.jobs if args.jobs > 0 else cpu_count(),
+        args.pdf_max_pages,
+    )
+    total = len(index.get_documents())
+    index.close()
+
+    print(f"Indexed {indexed} new or changed files, {total} files in the index at: {args.index_archive}")
+
+
+def query_archive(args: Namespace) -> None:
+    """Compare the input file with its most similar files of the archive given with --query, from parse_options
+
+    Archived files are ranked from the index, then the file is aligned with the top ones only
+    to write their comparison pages and a results page, opened in a web browser.
+
+    """
+
+    if not path.exists(path.join(args.query, INDEX_FILE)):
+        raise FileNotFoundError(f"No index found in: {args.query}. Please index an archive with --index_archive")
+
+    _, words, error = extract_words(args.in_dir, pdf_max_pages=args.pdf_max_pages)
+    if error is not None:
+        raise ValueError(f"Cannot compare {path.basename(args.in_dir)}: {error}")
+
+    index = ArchiveIndex(args.query)
+
+    if args.out_dir is not None and path.exists(args.out_dir):
+        results_directory = path.abspath(args.out_dir)
+    else:
+        results_directory = writing_results(datetime.now().strftime("%Y%m%d_%H%M%S"))
+
+    vocabulary = Vocabulary()
+    query_ids = vocabulary.encode(words)
+    query_name = get_filename(args.in_dir)
+    matches: List[Tuple[str, float, float]] = []
+
+    for name, key, fingerprints_score in index.query(words, args.top):
+        archived_words = index.get_words(key)
+        if archived_words is None:
+            print(f"Skipping {name}: its words are missing from the index, please index the archive again")
+            continue
+
+        score, matching_blocks = ENGINES[args.engine](query_ids, vocabulary.encode(archived_words), args.block_size)
+        papers_comparison(
+            results_directory,
+            len(matches),
+            words,
+            archived_words,
+            (query_name, get_filename(name)),
+            args.block_size,
+            matching_blocks,
+        )
+        matches.append((name, fingerprints_score, score))
+        print(f"{name}: {score}")
+
+    index.close()
+
+    html_path = path.join(results_directory, "_results.html")
+    matches_to_html(query_name, matches, html_path)
+    print(f"Results saved at: {html_path}")
+
+    import webbrowser  # pylint: disable=import-outside-toplevel
+
+    webbrowser.open(html_path)  # Open results HTML table
@@ -0,0 +1,183 @@
+""" This module stores processed files on disk to skip their extraction on later runs
+
+It hashes file contents.
+It encodes words lists in a compact binary form.
+It stores scores and matching blocks of pairs of files to skip their alignment on later runs.
+It keeps the cache under a size limit by evicting least recently used entries.
+
+"""
+
+import hashlib
+import struct
+import zlib
+from array import array
+from difflib import Match
+from os import getpid, listdir, makedirs, path, remove, replace, stat, utime
+from typing import List, Optional, Tuple
+
+# Size of the chunks read when hashing file contents
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def get_file_hash(file_path: str) -> str:
+    """Return the SHA-256 hex digest of the content of the file at specified path"""
+
+    digest = hashlib.sha256()
+
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def encode_words(words: list) -> bytes:
+    """Return words list as compressed bytes, words are separated by new lines"""
+
+    return zlib.compress("\n".join(words).encode("utf-8"))
+
+
+def decode_words(data: bytes) -> list:
+    """Return words list from bytes built by encode_words"""
+
+    content = zlib.decompress(data).decode("utf-8")
+
+    return content.split("\n") if content else []
+
+
+class DiskCache:
+    """Directory of cache entries bounded in size with least recently used eviction
+
+    Each entry is one file named after its key. Reading an entry updates its modification
+    time, which is used to find the least recently used entries when the cache is full.
+
+    """
+
+    file_extension = ".cache"
+
+    def __init__(self, directory: str, max_size: int) -> None:
+        self.directory = directory
+        self.max_size = max_size
+
+        if not path.exists(directory):
+            makedirs(directory)
+
+    def entry_path(self, key: str) -> str:
+        """Return path of the entry stored under key"""
+
+        return path.join(self.directory, key + self.file_extension)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return data stored under key or None if there is no such entry"""
+
+        entry_path = self.entry_path(key)
+
+        try:
+            with open(entry_path, "rb") as entry:
+                data = entry.read()
+            utime(entry_path)  # Mark entry as recently used
+        except FileNotFoundError:  # Missing or evicted by another process
+            return None
+
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store data under key
+
+        The size limit is not checked here, call evict once all entries of a run are stored.
+
+        """
+
+        entry_path = self.entry_path(key)
+        tmp_path = f"{entry_path}.{getpid()}.tmp"
+
+        # Write then rename so that a reader never sees a partial entry, even with several processes
+        with open(tmp_path, "wb") as entry:
+            entry.write(data)
+        replace(tmp_path, entry_path)
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits in its maximum size"""
+
+        entries: List[Tuple[float, int, str]] = []
+
+        for name in listdir(self.directory):
+            if name.endswith(self.file_extension):
+                try:
+                    entry_stat = stat(path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((entry_stat.st_mtime, entry_stat.st_size, name))
+
+        total_size = sum(size for _, size, _ in entries)
+
+        for _, size, name in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                remove(path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+
+class WordsCache(DiskCache):
+    """Cache of words lists extracted from files"""
+
+    file_extension = ".words"
+
+    def get_words(self, key: str) -> Optional[list]:
+        """Return words list stored under key or None"""
+
+        data = self.get(key)
+
+        return None if data is None else decode_words(data)
+
+    def put_words(self, key: str, words: list) -> None:
+        """Store words list under key"""
+
+        self.put(key, encode_words(words))
+
+
+def get_pair_cache_key(key1: str, key2: str, block_size: Optional[int], engine: str) -> str:
+    """Return the pairs cache key of two files from their words cache keys, in this order, and alignment settings"""
+
+    files_digest = hashlib.sha256(f"{key1}\n{key2}".encode("utf-8")).hexdigest()
+
+    return f"{files_digest}-s{block_size}-{engine}"
+
+
+def encode_pair(score: float, matching_blocks: list) -> bytes:
+    """Return score and matching blocks of a pair as bytes, blocks are stored as integer triples"""
+
+    blocks = array("q", [value for block in matching_blocks for value in (block.a, block.b, block.size)])
+
+    return struct.pack("d", score) + blocks.tobytes()
+
+
+def decode_pair(data: bytes) -> Tuple[float, list]:
+    """Return (score, matching blocks) from bytes built by encode_pair"""
+
+    (score,) = struct.unpack_from("d", data)
+    blocks = array("q")
+    blocks.frombytes(data[struct.calcsize("d") :])
+
+    return score, [Match(*blocks[ind : ind + 3]) for ind in range(0, len(blocks), 3)]
+
+
+class PairsCache(DiskCache):
+    """Cache of scores and matching blocks of aligned pairs of files"""
+
+    file_extension = ".pair"
+
+    def get_pair(self, key: str) -> Optional[Tuple[float, list]]:
+        """Return (score, matching blocks) stored under key or None"""
+
+        data = self.get(key)
+
+        return None if data is None else decode_pair(data)
+
+    def put_pair(self, key: str, score: float, matching_blocks: list) -> None:
+        """Store score and matching blocks under key"""
+
+        self.put(key, encode_pair(score, matching_blocks))
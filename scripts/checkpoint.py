@@ -0,0 +1,115 @@
+""" This module checkpoints compared pairs so that an interrupted run can be resumed
+
+It appends the score of each compared pair and whether its comparison file was written to a checkpoint file.
+It flushes the checkpoint file regularly, so that a killed run only loses its last seconds of work.
+It restores pairs of the checkpoint of an interrupted run made with the same files and settings.
+It removes the checkpoint file once the run is complete.
+
+"""
+
+import json
+from os import path, remove, replace
+from time import monotonic
+from typing import Any, Dict, Optional, TextIO, Tuple
+
+from scripts.utils import get_pair_index
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+CHECKPOINT_VERSION = 1
+
+# Seconds between two flushes of the checkpoint file
+FLUSH_INTERVAL = 10.0
+
+
+class Checkpoint:
+    """Append only file of the pairs compared by a run, in its results directory
+
+    The first line describes the run, each following line is a compared pair with its score,
+    whether its comparison file was written and whether its score is an upper bound. Pairs are
+    only restored by a run with the same description, the last line of a killed run may be
+    incomplete and is then ignored.
+
+    """
+
+    def __init__(self, directory: str, header: Dict[str, Any]) -> None:
+        self.directory = directory
+        # Compared with the header read from the file, so tuples are turned into lists as JSON does
+        self.header = json.loads(json.dumps({"version": CHECKPOINT_VERSION, **header}))
+        self.checkpoint_path = path.join(directory, CHECKPOINT_FILE)
+        self.checkpoint_file: Optional[TextIO] = None
+        self.last_flush = monotonic()
+
+    def restore(self, num_files: int) -> Dict[Tuple[int, int], Tuple[float, bool, bool]]:
+        """Return (score, has comparison file, score is a bound) of the pairs (i, j) with i < j of the checkpoint
+
+        Pairs whose comparison file is missing are left out, they are compared again.
+
+        """
+
+        restored: Dict[Tuple[int, int], Tuple[float, bool, bool]] = {}
+        if not path.exists(self.checkpoint_path):
+            return restored
+
+        with open(self.checkpoint_path, encoding="utf-8") as checkpoint_file:
+            try:
+                if json.loads(checkpoint_file.readline()) != self.header:
+                    return restored  # Checkpoint of a run with other files or settings
+
+                for line in checkpoint_file:
+                    pair = json.loads(line)
+                    i, j = pair["i"], pair["j"]
+                    if pair["page"] and not path.exists(
+                        path.join(self.directory, f"{get_pair_index(i, j, num_files)}.html")
+                    ):
+                        continue
+                    restored[(i, j)] = (pair["score"], pair["page"], pair["bound"])
+            except ValueError:  # Line cut when the run was killed
+                pass
+
+        return restored
+
+    def start(self, restored: Dict[Tuple[int, int], Tuple[float, bool, bool]]) -> None:
+        """Write a new checkpoint file made of the header and the restored pairs, then append pairs to it"""
+
+        tmp_path = f"{self.checkpoint_path}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+            checkpoint_file.write(json.dumps(self.header) + "\n")
+            for (i, j), (score, has_page, is_bound) in sorted(restored.items()):
+                checkpoint_file.write(self.get_line(i, j, score, has_page, is_bound))
+        replace(tmp_path, self.checkpoint_path)
+
+        self.checkpoint_file = open(self.checkpoint_path, "a", encoding="utf-8")  # pylint: disable=R1732
+        self.last_flush = monotonic()
+
+    @staticmethod
+    def get_line(i: int, j: int, score: float, has_page: bool, is_bound: bool) -> str:
+        """Return line of the checkpoint file of a compared pair"""
+
+        return json.dumps({"i": i, "j": j, "score": score, "page": has_page, "bound": is_bound}) + "\n"
+
+    def add_pair(self, i: int, j: int, score: float, has_page: bool, is_bound: bool) -> None:
+        """Append a compared pair, the file is flushed every FLUSH_INTERVAL seconds"""
+
+        if self.checkpoint_file is None:
+            raise ValueError("checkpoint is not started")
+
+        self.checkpoint_file.write(self.get_line(i, j, score, has_page, is_bound))
+
+        if monotonic() - self.last_flush >= FLUSH_INTERVAL:
+            self.checkpoint_file.flush()
+            self.last_flush = monotonic()
+
+    def close(self) -> None:
+        """Flush and close the checkpoint file"""
+
+        if self.checkpoint_file is not None:
+            self.checkpoint_file.close()
+            self.checkpoint_file = None
+
+    def remove(self) -> None:
+        """Close and remove the checkpoint file once the run is complete, there is nothing left to resume"""
+
+        self.close()
+        if path.exists(self.checkpoint_path):
+            remove(self.checkpoint_path)
@@ -0,0 +1,247 @@
+""" This module runs the comparison of all pairs of processed files
+
+It aligns each unordered pair of files once.
+It scores identical files without aligning them and reuses alignments cached by previous runs.
+It writes the HTML comparison page of each pair.
+It can spread the pairs over a pool of worker processes.
+It skips pairs whose score cannot reach a minimum score.
+It measures alignment and rendering times of each pair and can profile pairs with cProfile.
+
+"""
+
+import tempfile
+from difflib import Match
+from multiprocessing import Pool
+from os import path
+from time import perf_counter, process_time
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from scripts.cache import PairsCache, get_pair_cache_key
+from scripts.html_utils import filter_matching_blocks
+from scripts.html_writing import papers_comparison
+from scripts.metrics import PairTimings, RunMetrics, profile_call
+from scripts.similarity import ENGINES, get_ratio_upper_bound
+from scripts.utils import get_pair_index, get_pairs
+from scripts.vocabulary import Vocabulary
+
+
+class PairResult(NamedTuple):
+    """Score of a pair of files, whether its comparison page was written and whether the score is an upper bound"""
+
+    i: int
+    j: int
+    score: float
+    timings: PairTimings
+    has_page: bool
+    is_bound: bool
+
+
+# Files shared by all comparisons run in the current process, set once by init_worker
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def init_worker(
+    processed_files: list,
+    vocabulary: Vocabulary,
+    filenames: list,
+    results_directory: str,
+    block_size: int,
+    engine: str = "difflib",
+    files_keys: Optional[list] = None,
+    pairs_cache: Optional[PairsCache] = None,
+    min_score: float = 0.0,
+) -> None:
+    """Store the files to compare in the current process
+
+    Used as pool initializer so that the token lists are sent once to each worker
+    instead of being pickled again for every pair.
+
+    """
+
+    _WORKER_STATE.update(
+        processed_files=processed_files,
+        vocabulary=vocabulary,
+        filenames=filenames,
+        results_directory=results_directory,
+        block_size=block_size,
+        engine=engine,
+        files_keys=files_keys,
+        pairs_cache=pairs_cache,
+        min_score=min_score,
+    )
+
+
+def align_pair(i: int, j: int) -> Tuple[float, Optional[list]]:
+    """Return (score, matching blocks) of files i and j, or (upper bound of score, None) below the minimum score
+
+    Files with the same key have the same content, they fully match without being aligned.
+    Other pairs are looked up in the pairs cache, then rejected without alignment if an upper
+    bound of their score is below the minimum score, then aligned and stored in the cache.
+
+    """
+
+    processed_files, files_keys = _WORKER_STATE["processed_files"], _WORKER_STATE["files_keys"]
+    block_size, engine, pairs_cache = _WORKER_STATE["block_size"], _WORKER_STATE["engine"], _WORKER_STATE["pairs_cache"]
+    min_score = _WORKER_STATE["min_score"]
+
+    if files_keys is not None and files_keys[i] == files_keys[j]:
+        return 100.0, filter_matching_blocks([Match(0, 0, len(processed_files[i]))], block_size)
+
+    key = get_pair_cache_key(files_keys[i], files_keys[j], block_size, engine) if files_keys is not None else ""
+    cached = pairs_cache.get_pair(key) if pairs_cache is not None and files_keys is not None else None
+    if cached is not None:
+        return cached
+
+    if min_score > 0:
+        bound = get_ratio_upper_bound(processed_files[i], processed_files[j], min_score)
+        if bound < min_score:
+            return bound, None
+
+    score, matching_blocks = ENGINES[engine](processed_files[i], processed_files[j], block_size)
+    if pairs_cache is not None and files_keys is not None:
+        pairs_cache.put_pair(key, score, matching_blocks)
+
+    return score, matching_blocks
+
+
+def compare_pair_timed(task: Tuple[int, int, int]) -> PairResult:
+    """Align files i and j and write their comparison page if their score reaches the minimum score
+
+    Files are aligned on words identifiers, words are only decoded to write the page.
+
+    """
+
+    file_ind, i, j = task
+    processed_files, filenames = _WORKER_STATE["processed_files"], _WORKER_STATE["filenames"]
+    vocabulary = _WORKER_STATE["vocabulary"]
+
+    wall, cpu = perf_counter(), process_time()
+    score, matching_blocks = align_pair(i, j)
+    align_wall, align_cpu = perf_counter(), process_time()
+
+    has_page = matching_blocks is not None and score >= _WORKER_STATE["min_score"]
+    if has_page:
+        papers_comparison(
+            _WORKER_STATE["results_directory"],
+            file_ind,
+            vocabulary.decode(processed_files[i]),
+            vocabulary.decode(processed_files[j]),
+            (filenames[i], filenames[j]),
+            _WORKER_STATE["block_size"],
+            matching_blocks,
+        )
+
+    timings = PairTimings(align_wall - wall, align_cpu - cpu, perf_counter() - align_wall, process_time() - align_cpu)
+
+    return PairResult(i, j, score, timings, has_page, matching_blocks is None)
+
+
+def compare_pair(task: Tuple[int, int, int]) -> Tuple[int, int, float]:
+    """Align files i and j, write their comparison page and return (i, j, score)"""
+
+    result = compare_pair_timed(task)
+
+    return result.i, result.j, result.score
+
+
+def compare_files(
+    processed_files: list,
+    vocabulary: Vocabulary,
+    filenames: list,
+    results_directory: str,
+    block_size: int,
+    jobs: int = 1,
+    pairs: Optional[Set[Tuple[int, int]]] = None,
+    engine: str = "difflib",
+    files_keys: Optional[list] = None,
+    pairs_cache: Optional[PairsCache] = None,
+    metrics: Optional[RunMetrics] = None,
+    min_score: float = 0.0,
+    without_page: Optional[Dict[Tuple[int, int], bool]] = None,
+) -> Iterator[Tuple[int, int, float]]:
+    """Yield (i, j, score) for each unordered pair of files encoded with vocabulary as soon as it is compared
+
+    With more than one job, pairs are compared in a pool of worker processes and results
+    are yielded in completion order. Comparison pages are numbered after the pair, so the
+    written files do not depend on the number of jobs. When pairs is given, only these
+    unordered pairs (i, j) with i < j are compared. engine is the name of the alignment function
+    in similarity.ENGINES. files_keys are the words cache keys of the files, used to skip the
+    alignment of identical files and to look pairs up in pairs_cache. Timings of each pair are
+    recorded in metrics when it is given. Pairs scoring below min_score get no comparison page
+    and are added to without_page, mapped to True when their score is only an upper bound.
+
+    """
+
+    tasks: List[Tuple[int, int, int]] = [
+        (ind, i, j) for ind, (i, j) in enumerate(get_pairs(len(processed_files))) if pairs is None or (i, j) in pairs
+    ]
+    initargs = (
+        processed_files,
+        vocabulary,
+        filenames,
+        results_directory,
+        block_size,
+        engine,
+        files_keys,
+        pairs_cache,
+        min_score,
+    )
+
+    if jobs <= 1:
+        init_worker(*initargs)
+        yield from collect_results(map(compare_pair_timed, tasks), metrics, without_page)
+        return
+
+    if not tasks:
+        return
+
+    # Small chunks keep the progress bar moving while limiting inter-process traffic
+    chunksize = max(1, min(16, len(tasks) // (jobs * 4)))
+
+    with Pool(jobs, initializer=init_worker, initargs=initargs) as pool:
+        yield from collect_results(pool.imap_unordered(compare_pair_timed, tasks, chunksize), metrics, without_page)
+
+
+def collect_results(
+    results: Iterator[PairResult],
+    metrics: Optional[RunMetrics],
+    without_page: Optional[Dict[Tuple[int, int], bool]],
+) -> Iterator[Tuple[int, int, float]]:
+    """Yield (i, j, score) of results, recording their timings in metrics and pairs without page in without_page"""
+
+    for result in results:
+        if metrics is not None:
+            metrics.add_pair(result.i, result.j, result.timings)
+        if without_page is not None and not result.has_page:
+            without_page[(result.i, result.j)] = result.is_bound
+        yield result.i, result.j, result.score
+
+
+def profile_pairs(
+    pairs: List[Tuple[int, int]],
+    profiles_directory: str,
+    processed_files: list,
+    vocabulary: Vocabulary,
+    filenames: list,
+    block_size: int,
+    engine: str = "difflib",
+    files_keys: Optional[list] = None,
+    min_score: float = 0.0,
+) -> None:
+    """Compare pairs (i, j) again in the current process under cProfile
+
+    Pairs are compared as in the run, without the pairs cache so that they are really aligned.
+    Their comparison pages are written to a temporary directory, leaving the results untouched.
+    Statistics of each pair are written to profile_<page number>.prof in profiles_directory,
+    to be read with pstats or snakeviz.
+
+    """
+
+    with tempfile.TemporaryDirectory() as pages_directory:
+        init_worker(
+            processed_files, vocabulary, filenames, pages_directory, block_size, engine, files_keys, None, min_score
+        )
+
+        for i, j in pairs:
+            file_ind = get_pair_index(i, j, len(processed_files))
+            profile_call(compare_pair, (file_ind, i, j), path.join(profiles_directory, f"profile_{file_ind}.prof"))
@@ -1,7 +1,7 @@
 """ This script stores useful functions for html_writing.py file
 
-It finds occurences of matching blocks in text.
-It gets ordered positions of matching blocks in text.
+It finds matching blocks between texts.
+It gets ordered positions of matching blocks in text from words offsets.
 It returns colors depending on the similarity score.
 
 """
@@ -16,34 +16,45 @@ def get_real_matching_blocks(words_list1: list, words_list2: list, minimum_size:
     """Return list of matching blocks with size greater than n"""
 
     matching_blocks = difflib.SequenceMatcher(a=words_list1, b=words_list2).get_matching_blocks()
+
+    return filter_matching_blocks(matching_blocks, minimum_size)
+
+
+def filter_matching_blocks(matching_blocks: list, minimum_size: int = 2) -> list:
+    """Return matching blocks with size greater than n (2 when n is not a positive number)"""
+
     if minimum_size and minimum_size > 0:
         return [b for b in matching_blocks if b.size >= minimum_size]
 
     return [b for b in matching_blocks if b.size >= 2]
 
 
-def get_ordered_blocks_positions(string: str, matching_blocks: list, string_blocks: list) -> list:
-    """Return ordered list of all positions of matching blocks in string"""
+def get_words_offsets(words_list: list) -> list:
+    """Return position of each word in the string of all words joined by spaces"""
+
+    offsets = []
+    cursor = 0
+
+    for word in words_list:
+        offsets.append(cursor)
+        cursor += len(str(word)) + 1  # Word and the following space
+
+    return offsets
+
 
-    all_blocks_positions: List[Tuple[int, int]] = []
+def get_ordered_blocks_positions(words_offsets: list, matching_blocks: list, second_text: bool = False) -> list:
+    """Return ordered list of (position, block index) of matching blocks in string
 
-    for block_ind, _ in enumerate(matching_blocks):
-        # Find all positions of substring in string
-        block_positions = [char for char in range(len(string)) if string.startswith(string_blocks[block_ind], char)]
+    Positions come from the word index of each block in the first text (block.a) or the
+    second text (block.b) and the words offsets of this text, so that only the words actually
+    matched are highlighted, not every other occurrence of the same words.
 
-        for position in block_positions:
-            # We check if there is another block starting at the same position
-            var = [pos_tuple for pos_tuple in all_blocks_positions if pos_tuple[0] == position]
-            if var:  # If there is one such block
-                size = len(string_blocks[var[0][1]])  # get size of block in var
-                if size < len(string_blocks[block_ind]):
-                    # Remove old position block which is smaller than curr block
-                    all_blocks_positions.pop(all_blocks_positions.index(var[0]))
+    """
 
-                    # Add new block to list
-                    all_blocks_positions.append((position, block_ind))
-            else:
-                all_blocks_positions.append((position, block_ind))
+    all_blocks_positions: List[Tuple[int, int]] = [
+        (words_offsets[block.b if second_text else block.a], block_ind)
+        for block_ind, block in enumerate(matching_blocks)
+    ]
 
     return sorted(all_blocks_positions, key=itemgetter(0))
 
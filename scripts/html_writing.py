@@ -1,76 +1,59 @@
 """ This script is used for writing in HTML files
 
-It adds links to HTML table.
-It generates span tags for un/colored matching blocks.
+It writes the results table with links to comparison files.
+It writes tables of other scores of all pairs of files below it.
+It writes the table of the archived files most similar to a queried file.
+It generates spans for un/colored matching blocks.
 It compares two text files
-It inserts comparison results in corresponding html files
+It writes comparison results from the template in corresponding html files
 
 """
 
-from os import fsync, path
-from random import randint
-from shutil import copyfile, copy
-from typing import Any, List
-
-from bs4 import BeautifulSoup as Bs
 import importlib.resources
-from tabulate import tabulate
+from functools import lru_cache
+from html import escape
+from os import path
+from random import Random
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
 
 from scripts.html_utils import (
     get_color_from_similarity,
     get_real_matching_blocks,
     blocks_list_to_strings_list,
     get_ordered_blocks_positions,
+    get_words_offsets,
 )
-from scripts.utils import is_float
-
-
-def add_links_to_html_table(html_path: str) -> None:
-    """Add links to HTML data cells at specified path
-
-    This method will link to all HTML TD tags which contain a float different from - 1 the
-    corresponding HTML comparison file. The links will be opened in a new tab. The colors of
-    the text in tag will change depending on similarity score.
+from scripts.utils import get_pair_index
 
-    """
-
-    with open(html_path, encoding="utf-8") as html:
-        soup = Bs(html, "html.parser")
-        file_ind = 0  # Cursor on file number for the naming of html files
-
-        for td_tag in soup.findAll("td"):  # Retrieve all data celss from html table in path
-            if is_float(td_tag.text):  # If td is not filename or -1
-                tmp = soup.new_tag(
-                    "a",
-                    href="file:///" + html_path.replace("_results", str(file_ind)),
-                    target="_blank",
-                    style="color:" + get_color_from_similarity(float(td_tag.text)),
-                )
+# Tags of the template columns in which compared texts are written
+LEFT_CONTENT_TAG = '<div class="content" id="leftContent">'
+RIGHT_CONTENT_TAG = '<div class="content" id="rightContent">'
+HTML_BUFFER_SIZE = 1 << 16
 
-                td_tag.string.wrap(tmp)  # We wrap the td string between the hyperlink
-                file_ind += 1
 
-        # We update the HTML of the file at path
-        with open(html_path, "wb") as f_output:
-            f_output.write(soup.prettify("utf-8"))
-            f_output.flush()
-            fsync(f_output.fileno())
-            f_output.close()
+def get_span_blocks(
+    text1: list,
+    text2: list,
+    block_size: int,
+    matching_blocks: Optional[list] = None,
+    seed: Optional[int] = None,
+) -> list:
+    """Return list of (text, style) spans with colors for HTML rendering, style is None for uncolored spans
 
+    Matching blocks already computed for this pair of texts can be given to avoid aligning them again.
+    Colors of the blocks are random, a seed makes them reproducible.
 
-def get_span_blocks(bs_obj: Bs, text1: list, text2: list, block_size: int) -> list:
-    """Return list of spans with colors for HTML rendering"""
+    """
 
-    results: List[List[Any]] = [[], []]  # List of spans list
+    results: List[List[Tuple[str, Optional[str]]]] = [[], []]  # List of spans list
 
     # Get matching blocks with chosen minimum size
-    matching_blocks = get_real_matching_blocks(text1, text2, block_size)
+    if matching_blocks is None:
+        matching_blocks = get_real_matching_blocks(text1, text2, block_size)
 
     # Generate one unique color for each matching block
-    colors = [f"#{randint(0, 0xFFFFFF):06X}" for _ in range(len(matching_blocks))]
-
-    # Convert blocks from list of list of strings to list of strings
-    string_blocks = [" ".join(map(str, text1[b.a : b.a + b.size])) for b in matching_blocks]
+    rng = Random(seed)
+    colors = [f"#{rng.randint(0, 0xFFFFFF):06X}" for _ in range(len(matching_blocks))]
 
     # Store lengths of blocks in text
     strings_len_list = blocks_list_to_strings_list(matching_blocks, text1)
@@ -79,8 +62,8 @@ def get_span_blocks(bs_obj: Bs, text1: list, text2: list, block_size: int) -> li
     str1, str2 = " ".join(map(str, text1)), " ".join(map(str, text2))
 
     global_positions_list = [
-        get_ordered_blocks_positions(str1, matching_blocks, string_blocks),
-        get_ordered_blocks_positions(str2, matching_blocks, string_blocks),
+        get_ordered_blocks_positions(get_words_offsets(text1), matching_blocks),
+        get_ordered_blocks_positions(get_words_offsets(text2), matching_blocks, second_text=True),
     ]
 
     for num, pos_list in enumerate(global_positions_list):
@@ -90,73 +73,194 @@ def get_span_blocks(bs_obj: Bs, text1: list, text2: list, block_size: int) -> li
             str1 = str2
 
         for block in pos_list:
-            # Span tag for the text before the matching sequence
-            span = bs_obj.new_tag("span")
-            span.string = str1[cursor : block[0]]
-
-            # Span tag for the text in the matching sequence
-            blockspan = bs_obj.new_tag("span", style="color:" + colors[block[1]] + "; font-weight:bold")
-            blockspan.string = str1[block[0] : block[0] + strings_len_list[block[1]]]
-
-            # Append spans tags to results list
-            results[num].append(span)
-            results[num].append(blockspan)
+            # Span for the text before the matching sequence
+            results[num].append((str1[cursor : block[0]], None))
+
+            # Span for the text in the matching sequence
+            results[num].append(
+                (
+                    str1[block[0] : block[0] + strings_len_list[block[1]]],
+                    "color:" + colors[block[1]] + "; font-weight:bold",
+                )
+            )
 
             # Update cursor position after last matching sequence
             cursor = block[0] + strings_len_list[block[1]]
 
-        # End of loop, last span tag for the rest of the text
-        span = bs_obj.new_tag("span")
-        span.string = str1[cursor:]
-        results[num].append(span)
+        # End of loop, last span for the rest of the text
+        results[num].append((str1[cursor:], None))
 
     return results
 
 
-def papers_comparison(save_dir: str, ind: int, text1: list, text2: list, filenames: tuple, block_size: int) -> None:
-    """Write to HTML file texts that have been compared with highlighted similar blocks"""
+@lru_cache(maxsize=1)
+def get_template_parts() -> Tuple[str, str, str]:
+    """Return comparison template split around the contents of its left and right columns
+
+    The template is read once per process and reused for all comparison pages.
 
-    try:
-        with importlib.resources.path("scripts", "template.html") as template_path:
-            comp_path = path.join(save_dir, f"{ind}.html")
-            copyfile(template_path, comp_path)
-    except ModuleNotFoundError:
-        # Fallback for local development
-        template_path_local = path.join("template.html")
-        comp_path = path.join(save_dir, str(ind) + ".html")
+    """
+
+    template = importlib.resources.files("scripts").joinpath("template.html").read_text(encoding="utf-8")
+    left = template.index(LEFT_CONTENT_TAG) + len(LEFT_CONTENT_TAG)
+    right = template.index(RIGHT_CONTENT_TAG) + len(RIGHT_CONTENT_TAG)
+
+    return template[:left], template[left:right], template[right:]
+
+
+def write_spans(html: TextIO, filename: str, spans: list) -> None:
+    """Write filename title and escaped spans of one text to HTML file"""
+
+    html.write(f"\n<h3>{escape(filename)}</h3>\n")
+
+    for text, style in spans:
+        if style is not None:
+            html.write(f'<span style="{style}">{escape(text, quote=False)}</span>\n')
+        elif text:  # Empty uncolored spans do not change the rendering
+            html.write(f"<span>{escape(text, quote=False)}</span>\n")
+
+
+def papers_comparison(
+    save_dir: str,
+    ind: int,
+    text1: list,
+    text2: list,
+    filenames: tuple,
+    block_size: int,
+    matching_blocks: Optional[list] = None,
+) -> None:
+    """Write to HTML file texts that have been compared with highlighted similar blocks
+
+    The page is written in one pass from the template, without parsing it.
+    Colors of the blocks are seeded with the file number so that a page is the same whichever
+    process writes it.
+
+    """
 
-        # Copy the template to the save directory under a new name
-        copy(template_path_local, comp_path)
+    head, middle, tail = get_template_parts()
+    res = get_span_blocks(text1, text2, block_size, matching_blocks, seed=ind)
 
-    with open(comp_path, encoding="utf-8") as html:
-        soup = Bs(html, "html.parser")
-        res = get_span_blocks(soup, text1, text2, block_size)
-        blocks = [soup.find(id="leftContent"), soup.find(id="rightContent")]
+    with open(path.join(save_dir, f"{ind}.html"), "w", encoding="utf-8", buffering=HTML_BUFFER_SIZE) as html:
+        html.write(head)
+        write_spans(html, filenames[0], res[0])
+        html.write(middle)
+        write_spans(html, filenames[1], res[1])
+        html.write(tail)
 
-        # Append filename tags and span tags to html
-        for i, filename in enumerate(filenames):
-            temp_tag = soup.new_tag("h3")
-            temp_tag.string = filename
-            blocks[i].append(temp_tag)
-            for tag in res[i]:
-                blocks[i].append(tag)
 
-    # Write the modified content back to the file
-    with open(comp_path, "wb") as f_output:
-        f_output.write(soup.prettify("utf-8"))
+def get_score_cell(score: float, link: Optional[str], is_bound: bool = False, is_estimate: bool = False) -> str:
+    """Return HTML data cell of a similarity score, linked to its comparison file if there is one
 
+    The link opens in a new tab and the color of the score depends on its value. A score that is
+    only an upper bound is written after a less-than-or-equal sign, a score estimated without
+    aligning the files after an almost-equal sign.
+
+    """
+
+    if is_bound:
+        return f"<td>&le; {score}</td>"
+
+    if is_estimate:
+        return f"<td>&asymp; {score}</td>"
+
+    if link is None:
+        return f"<td>{score}</td>"
+
+    return (
+        f'<td><a href="{escape(link)}" target="_blank" '
+        f'style="color:{get_color_from_similarity(score)}">{score}</a></td>'
+    )
+
+
+def write_scores_table(
+    file: TextIO,
+    scores: list,
+    files_names: list,
+    links: Optional[Callable] = None,
+    upper_bounds: Optional[set] = None,
+    estimates: Optional[set] = None,
+) -> None:
+    """Write HTML table of a matrix of scores, links(i, j) returns the link of cell (i, j) or None
+
+    Scores of the unordered pairs (i, j) with i < j in upper_bounds are only upper bounds, scores
+    of those in estimates are only estimates.
+
+    """
+
+    file.write("<table>\n<tbody>\n<tr><td></td>")
+    file.write("".join(f"<td>{escape(file_name)}</td>" for file_name in files_names))
+    file.write("</tr>\n")
+
+    for i, (file_name, row) in enumerate(zip(files_names, scores)):
+        cells = [f"<td>{escape(file_name)}</td>"]
+        cells.extend(
+            get_score_cell(
+                score,
+                links(i, j) if links else None,
+                upper_bounds is not None and (min(i, j), max(i, j)) in upper_bounds,
+                estimates is not None and (min(i, j), max(i, j)) in estimates,
+            )
+            for j, score in enumerate(row)
+        )
+        file.write(f"<tr>{''.join(cells)}</tr>\n")
+
+    file.write("</tbody>\n</table>\n")
+
+
+def results_to_html(
+    scores: list,
+    files_names: list,
+    html_path: str,
+    compared_pairs: Optional[set] = None,
+    metrics: Optional[Dict[str, list]] = None,
+    upper_bounds: Optional[set] = None,
+    estimates: Optional[set] = None,
+) -> None:
+    """Write similarity results to HTML page
+
+    The table is written in one pass, each score except the diagonal links to the comparison file
+    of its pair of files. Both cells of a pair, (i, j) and (j, i), link to the same side by side
+    comparison. When compared_pairs is given, only cells of these unordered pairs (i, j) with i < j
+    have a comparison file to link to, scores of the pairs in upper_bounds are only upper bounds
+    and scores of the pairs in estimates are MinHash estimates, on another scale. metrics maps
+    titles to matrices of other scores, each written below as a table without links.
+
+    """
+
+    results_dir = path.dirname(html_path)
+
+    def get_link(i: int, j: int) -> Optional[str]:
+        if i == j or (compared_pairs is not None and (min(i, j), max(i, j)) not in compared_pairs):
+            return None
+
+        # Number of the comparison html file
+        file_ind = get_pair_index(i, j, len(files_names))
+        return "file:///" + path.join(results_dir, f"{file_ind}.html")
+
+    with open(html_path, "w", encoding="utf-8", buffering=HTML_BUFFER_SIZE) as file:
+        write_scores_table(file, scores, files_names, get_link, upper_bounds, estimates)
+
+        for title, matrix in (metrics or {}).items():
+            file.write(f"<h3>{escape(title)}</h3>\n")
+            write_scores_table(file, matrix, files_names)
+
+
+def matches_to_html(query_name: str, matches: List[Tuple[str, float, float]], html_path: str) -> None:
+    """Write HTML page of the archived files most similar to a queried file
+
+    matches are (archived file name, fingerprints similarity, similarity) in decreasing order, the
+    similarity of match number k links to the comparison file k.html next to html_path.
+
+    """
 
-def results_to_html(scores: list, files_names: list, html_path: str) -> None:
-    """Write similarity results to HTML page"""
+    results_dir = path.dirname(html_path)
 
-    for ind, file_name in enumerate(files_names):
-        scores[ind].insert(0, file_name)
+    with open(html_path, "w", encoding="utf-8", buffering=HTML_BUFFER_SIZE) as file:
+        file.write(f"<h3>{escape(query_name)}</h3>\n")
+        file.write("<table>\n<tbody>\n<tr><td></td><td>Fingerprints similarity</td><td>Similarity</td></tr>\n")
 
-    scores.insert(0, files_names)
-    scores[0].insert(0, "")
+        for ind, (name, fingerprints_score, score) in enumerate(matches):
+            link = "file:///" + path.join(results_dir, f"{ind}.html")
+            file.write(f"<tr><td>{escape(name)}</td><td>{fingerprints_score}</td>{get_score_cell(score, link)}</tr>\n")
 
-    with open(html_path, "w", encoding="utf-8") as file:
-        file.write(tabulate(scores, tablefmt="html"))
-        file.flush()
-        fsync(file.fileno())
-        file.close()
+        file.write("</tbody>\n</table>\n")
@@ -0,0 +1,185 @@
+""" This module persists a corpus between runs to only compare new or changed files
+
+It stores words of processed files in a state directory.
+It stores the score of each pair of files and whether its comparison file was written.
+It renumbers comparison files of unchanged pairs when files are added or removed.
+
+"""
+
+import json
+from argparse import Namespace
+from os import listdir, path, remove, replace
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from scripts.cache import WordsCache
+from scripts.utils import get_pair_index
+
+STATE_FILE = "state.json"
+STATE_VERSION = 3
+
+# Options changing scores or comparison files, a state made with other values is discarded
+STATE_SETTINGS = (
+    "block_size",
+    "engine",
+    "min_score",
+    "lsh_threshold",
+    "lsh_recall",
+    "lsh_permutations",
+    "shingle_size",
+    "winnowing",
+    "kgram_size",
+    "window_size",
+)
+
+
+def get_state_settings(args: Namespace) -> Dict[str, Any]:
+    """Return settings of the comparison stored with the state from parsed command-line arguments"""
+
+    return {name: getattr(args, name) for name in STATE_SETTINGS}
+
+
+def get_pair_key(name1: str, name2: str) -> str:
+    """Return key of a pair of files in the state, the same for both orders"""
+
+    return "\n".join(sorted((name1, name2)))
+
+
+class CorpusState:
+    """Files, scores and comparison files of previous runs kept in a state directory
+
+    A file is unchanged when its name and its words cache key, made of its content hash and
+    extractor version, are the same as in the previous run. Pairs of unchanged files keep their
+    score and comparison file, all other pairs must be compared again. The state is discarded
+    when the settings of the comparison change.
+
+    """
+
+    def __init__(self, directory: str, settings: Dict[str, Any]) -> None:
+        self.directory = directory
+        self.settings = settings
+        self.files: Dict[str, str] = {}  # File name to words cache key
+        self.pairs: Dict[str, Dict[str, Any]] = {}  # Pair key to score and comparison file number
+        self.words = WordsCache(path.join(directory, "words"), 0)  # Only trimmed by save, never evicted
+
+        state_path = path.join(directory, STATE_FILE)
+        if path.exists(state_path):
+            with open(state_path, encoding="utf-8") as state_file:
+                state = json.load(state_file)
+
+            if state.get("version") == STATE_VERSION and state.get("settings") == settings:
+                self.files, self.pairs = state["files"], state["pairs"]
+
+    def has_words(self, name: str, key: str) -> bool:
+        """Return True if file name is unchanged since the previous run and its words are stored"""
+
+        return self.files.get(name) == key and path.exists(self.words.entry_path(key))
+
+    def get_words(self, name: str, key: str) -> Optional[list]:
+        """Return words of file name if it is unchanged since the previous run, None otherwise"""
+
+        if self.files.get(name) != key:
+            return None
+
+        return self.words.get_words(key)
+
+    def add_words(self, key: str, words: list) -> None:
+        """Store words of a new or changed file"""
+
+        if self.words.get(key) is None:
+            self.words.put_words(key, words)
+
+    def restore(
+        self, filenames: List[str], keys: List[str], kept_pages: Optional[Set[int]] = None
+    ) -> Dict[Tuple[int, int], Tuple[float, bool, bool]]:
+        """Return (score, has comparison file, score is a bound) of the pairs (i, j) with i < j of unchanged files
+
+        Comparison files of these pairs are renamed after the number of their pair among filenames,
+        comparison files of all other pairs are removed, except those numbered in kept_pages. The
+        state is stored with the new numbers before the comparison files get them, so a killed run
+        never leaves a pair linked to the comparison file of another pair.
+
+        """
+
+        restored: Dict[Tuple[int, int], Tuple[float, bool, bool]] = {}
+        pairs: Dict[str, Dict[str, Any]] = {}
+        moves: List[Tuple[str, str]] = []
+        unchanged = [ind for ind, (name, key) in enumerate(zip(filenames, keys)) if self.files.get(name) == key]
+
+        for position, i in enumerate(unchanged):
+            for j in unchanged[position + 1 :]:
+                pair = self.pairs.get(get_pair_key(filenames[i], filenames[j]))
+                if pair is None:
+                    continue
+
+                if pair["page"] is not None and not path.exists(path.join(self.directory, f"{pair['page']}.html")):
+                    continue  # Comparison file was deleted, the pair is compared again
+
+                restored[(i, j)] = (pair["score"], pair["page"] is not None, pair["bound"])
+                page = None if pair["page"] is None else get_pair_index(i, j, len(filenames))
+                pairs[get_pair_key(filenames[i], filenames[j])] = {**pair, "page": page}
+                if page is not None:
+                    moves.append((f"{pair['page']}.html", f"{page}.html"))
+
+        # Move kept comparison files aside first so that renaming never overwrites one of them
+        for old_name, new_name in moves:
+            replace(path.join(self.directory, old_name), path.join(self.directory, f"{new_name}.tmp"))
+
+        for name in listdir(self.directory):
+            if name.endswith(".html") and name[: -len(".html")].isdigit():
+                if kept_pages is None or int(name[: -len(".html")]) not in kept_pages:
+                    remove(path.join(self.directory, name))
+
+        # No comparison file has its new number yet, pairs whose file is still missing are compared again
+        self.files = {filenames[ind]: keys[ind] for ind in unchanged}
+        self.pairs = pairs
+        self.write()
+
+        for _, new_name in moves:
+            replace(path.join(self.directory, f"{new_name}.tmp"), path.join(self.directory, new_name))
+
+        return restored
+
+    def save(
+        self,
+        filenames: List[str],
+        keys: List[str],
+        scores: list,
+        compared_pairs: set,
+        upper_bounds: Optional[set] = None,
+    ) -> None:
+        """Store files, scores and comparison files numbers of this run, drop words of removed files
+
+        Scores of the pairs (i, j) with i < j in upper_bounds are stored as upper bounds.
+
+        """
+
+        self.files = dict(zip(filenames, keys))
+        self.pairs = {}
+
+        for i, name1 in enumerate(filenames):
+            for j in range(i + 1, len(filenames)):
+                page = get_pair_index(i, j, len(filenames)) if (i, j) in compared_pairs else None
+                self.pairs[get_pair_key(name1, filenames[j])] = {
+                    "score": scores[i][j],
+                    "page": page,
+                    "bound": upper_bounds is not None and (i, j) in upper_bounds,
+                }
+
+        kept_keys = set(keys)
+        for name in listdir(self.words.directory):
+            if name.endswith(self.words.file_extension) and name[: -len(self.words.file_extension)] not in kept_keys:
+                remove(path.join(self.words.directory, name))
+
+        self.write()
+
+    def write(self) -> None:
+        """Write files and pairs to the state file, replaced at once so that it is never left incomplete"""
+
+        tmp_path = path.join(self.directory, f"{STATE_FILE}.tmp")
+
+        with open(tmp_path, "w", encoding="utf-8") as state_file:
+            json.dump(
+                {"version": STATE_VERSION, "settings": self.settings, "files": self.files, "pairs": self.pairs},
+                state_file,
+            )
+        replace(tmp_path, path.join(self.directory, STATE_FILE))
@@ -7,18 +7,30 @@ It uses difflib library to find matching sequences.
 It can also use Jaccard Similarity, words counting, overlapping words for similarity
 
 """
-import webbrowser
+from argparse import Namespace
 from datetime import datetime
+from multiprocessing import cpu_count
 from os import listdir, path
-from typing import List
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
 
 from tqdm import tqdm
 
-from scripts.html_writing import add_links_to_html_table, results_to_html, papers_comparison
+from scripts.archive import index_archive, query_archive
+from scripts.cache import PairsCache, WordsCache
+from scripts.checkpoint import Checkpoint
+from scripts.comparison import compare_files, profile_pairs
+from scripts.html_writing import results_to_html
 from scripts.html_utils import writing_results
-from scripts.processing_files import file_extension_call
-from scripts.similarity import difflib_overlap
-from scripts.utils import wait_for_file, parse_options
+from scripts.incremental import CorpusState, get_state_settings
+from scripts.metrics import RunMetrics
+from scripts.minhash import prune_pairs
+from scripts.processing_files import extract_files, try_get_cache_key
+from scripts.scores_export import write_scores
+from scripts.similarity import METRICS, get_metric_matrix
+from scripts.token_store import TokenStoreWriter
+from scripts.utils import get_filename, get_pair_index, get_pairs, parse_options
+from scripts.vocabulary import Vocabulary
+from scripts.winnowing import fingerprints_scores
 
 
 class MinimumFilesError(Exception):
@@ -27,16 +39,272 @@ class MinimumFilesError(Exception):
     pass
 
 
-class UnsupportedFileError(Exception):
-    """Raised when there are unsupported files in the input directory."""
+class PathNotFoundError(Exception):
+    """Raised when the specified input directory path does not exist."""
 
     pass
 
 
-class PathNotFoundError(Exception):
-    """Raised when the specified input directory path does not exist."""
+class Corpus(NamedTuple):
+    """Processed files of a run with their names and words cache keys"""
 
-    pass
+    processed_files: Any  # List of arrays or token store, both indexed by file
+    vocabulary: Vocabulary
+    filenames: List[str]
+    files_keys: List[str]
+
+
+class Schedule(NamedTuple):
+    """Scores matrix of a run with the pairs left to compare, the pairs with a comparison page and the bounded pairs"""
+
+    scores: List[List[float]]
+    pairs: Set[Tuple[int, int]]
+    compared_pairs: Set[Tuple[int, int]]
+    upper_bounds: Set[Tuple[int, int]]  # Pairs whose score is an upper bound below the minimum score
+    estimates: Set[Tuple[int, int]]  # Pairs pruned by MinHash, whose score is an estimate on another scale
+    metrics_tables: Dict[str, List[List[float]]]  # Other scores of all pairs, by metric label
+    checkpoint: Checkpoint
+
+
+def extract_corpus(
+    args: Namespace, files_paths: List[str], jobs: int, state: Optional[CorpusState], run_metrics: RunMetrics
+) -> Corpus:
+    """Extract and encode words of files_paths, files that cannot be processed are reported and skipped
+
+    Words of files unchanged since the previous incremental run are restored from state
+    instead of being extracted, words of other files are added to it.
+
+    """
+
+    filenames, files_keys = [], []
+    encoded_files: list = []
+    vocabulary = Vocabulary()
+    # Content keys of files, identical files have the same key. Files without key cannot be read and are skipped
+    keys, errors = {}, {}
+    for file in files_paths:
+        key, error = try_get_cache_key(file, args.pdf_max_pages)
+        if key is not None:
+            keys[file] = key
+        else:
+            errors[file] = error
+    # Encoded files are written to disk as soon as they are processed instead of being kept in memory
+    token_writer = TokenStoreWriter(args.token_store) if args.token_store else None
+
+    # Words of files unchanged since the previous incremental run are not extracted again
+    restored = {file for file, key in keys.items() if state and state.has_words(get_filename(file), key)}
+    to_extract = [file for file in keys if file not in restored]
+    cache = WordsCache(args.cache_dir, args.cache_size * 1024 * 1024) if args.cache_dir else None
+    extracted = iter(
+        tqdm(
+            extract_files(to_extract, jobs, cache, args.pdf_max_pages, [keys[file] for file in to_extract]),
+            total=len(to_extract),
+            desc="Processing Files",
+        )
+    )
+
+    # Files are processed one at a time in order, so only the words of one file are held at a time
+    for file in files_paths:
+        if file in errors:
+            file_words: list = []
+            error = errors[file]
+        elif file in restored and state is not None:
+            restored_words = state.get_words(get_filename(file), keys[file])
+            file_words, error = (
+                (restored_words, None) if restored_words is not None else ([], "words of the previous run are missing")
+            )
+        else:
+            _, file_words, error = next(extracted)
+
+        if error is None:
+            word_ids = vocabulary.encode(file_words)  # Words are stored as integers
+            if token_writer is not None:
+                token_writer.append(word_ids)
+            else:
+                encoded_files.append(word_ids)
+            filenames.append(get_filename(file))
+            files_keys.append(keys[file])
+            run_metrics.add_file(filenames[-1], path.getsize(file), len(file_words))
+            if state is not None:
+                state.add_words(keys[file], file_words)
+        else:  # Failures are reported per file and the file is left out of the comparison
+            tqdm.write(f"Skipping {path.basename(file)}: {error}")
+
+    next(extracted, None)  # Run the extraction to its end, where the words cache is trimmed
+    processed_files = token_writer.close() if token_writer is not None else encoded_files
+
+    return Corpus(processed_files, vocabulary, filenames, files_keys)
+
+
+def schedule_pairs(
+    args: Namespace, corpus: Corpus, results_directory: str, jobs: int, state: Optional[CorpusState]
+) -> Schedule:
+    """Return the scores known before aligning any pair and the pairs left to compare
+
+    Pairs pruned by MinHash get an estimated score, winnowing runs score all pairs from shared
+    fingerprints. Pairs of files unchanged since the previous incremental run and pairs compared
+    by the interrupted run being resumed keep their score and comparison file. Other metrics are
+    computed here so that a missing NLTK corpus stops the run before any pair is aligned.
+
+    """
+
+    # Other scores of all pairs are computed at once for the whole corpus
+    metrics_tables = {
+        METRICS[metric]: get_metric_matrix(metric, corpus.processed_files, corpus.vocabulary)
+        for metric in args.metric or []
+    }
+
+    num_files = len(corpus.processed_files)
+    # Each unordered pair is aligned once, its score fills both cells of the matrix
+    scores: List[List[float]] = [[-1] * num_files for _ in range(num_files)]
+    pairs = set(get_pairs(num_files))
+    estimates: Dict[Tuple[int, int], float] = {}
+
+    if args.lsh_threshold is not None:  # Only align pairs likely to be similar, estimate scores of the others
+        pairs, estimates = prune_pairs(
+            corpus.processed_files,
+            args.lsh_threshold,
+            args.lsh_recall,
+            args.lsh_permutations,
+            args.shingle_size,
+            jobs,
+        )
+        for (i, j), estimate in estimates.items():
+            scores[i][j] = scores[j][i] = estimate
+
+    if args.winnowing:  # Score pairs from shared fingerprints, only align pairs sharing some for their page
+        fingerprints_similarities = fingerprints_scores(corpus.processed_files, args.kgram_size, args.window_size)
+        pairs = set(fingerprints_similarities)
+        for i, j in get_pairs(num_files):
+            scores[i][j] = scores[j][i] = fingerprints_similarities.get((i, j), 0.0)
+
+    # Pairs compared by the interrupted run are not compared again, with the same files and settings
+    checkpoint = Checkpoint(
+        results_directory,
+        {"files": list(zip(corpus.filenames, corpus.files_keys)), "settings": get_state_settings(args)},
+    )
+    resumed = checkpoint.restore(num_files) if args.resume else {}
+
+    # Pairs of files unchanged since the previous incremental run keep their score and comparison file,
+    # comparison files of resumed pairs are already numbered for this run and are kept as they are
+    resumed_pages = {get_pair_index(i, j, num_files) for (i, j), (_, has_page, _) in resumed.items() if has_page}
+    restored_pairs = state.restore(corpus.filenames, corpus.files_keys, resumed_pages) if state is not None else {}
+    resumed = {pair: result for pair, result in resumed.items() if pair in pairs and pair not in restored_pairs}
+    checkpoint.start(resumed)
+
+    compared_pairs = set(pairs)
+    upper_bounds = set()
+    for (i, j), (score, has_page, is_bound) in {**restored_pairs, **resumed}.items():
+        scores[i][j] = scores[j][i] = score
+        pairs.discard((i, j))
+        if has_page:
+            compared_pairs.add((i, j))
+        else:
+            compared_pairs.discard((i, j))
+        if is_bound:
+            upper_bounds.add((i, j))
+
+    # Pruning only depends on both files, restored pairs pruned by this run were estimated by the previous one
+    return Schedule(scores, pairs, compared_pairs, upper_bounds, set(estimates), metrics_tables, checkpoint)
+
+
+def compare_pairs(
+    args: Namespace, corpus: Corpus, schedule: Schedule, results_directory: str, jobs: int, run_metrics: RunMetrics
+) -> None:
+    """Align pairs left to compare and write their comparison pages, updating scores and pairs of schedule
+
+    Each compared pair is appended to the checkpoint of schedule.
+
+    """
+
+    # Alignments of pairs of files already compared by previous runs are reused from the cache
+    pairs_cache = (
+        PairsCache(path.join(args.cache_dir, "pairs"), args.cache_size * 1024 * 1024) if args.cache_dir else None
+    )
+    without_page: Dict[Tuple[int, int], bool] = {}  # Pairs below the minimum score get no comparison page
+    scores = schedule.scores
+    comparisons = compare_files(
+        corpus.processed_files,
+        corpus.vocabulary,
+        corpus.filenames,
+        results_directory,
+        args.block_size,
+        jobs,
+        schedule.pairs,
+        args.engine,
+        corpus.files_keys,
+        pairs_cache,
+        run_metrics,
+        args.min_score,
+        without_page,
+    )
+
+    with run_metrics.stage("comparison"):
+        for i, j, score in tqdm(comparisons, total=len(schedule.pairs), desc="Comparing Files"):
+            if not args.winnowing:
+                scores[i][j] = scores[j][i] = score
+            # Cells of winnowing runs show fingerprints scores, never bounds
+            schedule.checkpoint.add_pair(
+                i,
+                j,
+                scores[i][j],
+                (i, j) not in without_page,
+                without_page.get((i, j), False) and not args.winnowing,
+            )
+
+        schedule.checkpoint.close()
+
+        if pairs_cache is not None:
+            pairs_cache.evict()
+
+    for pair, is_bound in without_page.items():
+        schedule.compared_pairs.discard(pair)
+        if is_bound and not args.winnowing:  # Cells of winnowing runs show fingerprints scores
+            schedule.upper_bounds.add(pair)
+
+
+def write_summary(
+    args: Namespace, corpus: Corpus, schedule: Schedule, results_directory: str, run_metrics: RunMetrics
+) -> None:
+    """Write the results page, optionally followed by other scores of all pairs, and the requested exports
+
+    Slowest pairs are compared again under cProfile when profiling is requested.
+
+    """
+
+    print(f"Results saved at: {path.join(results_directory, '_results.html')}")
+
+    with run_metrics.stage("summary"):
+        results_to_html(
+            schedule.scores,
+            corpus.filenames,
+            path.join(results_directory, "_results.html"),
+            schedule.compared_pairs,
+            schedule.metrics_tables,
+            schedule.upper_bounds,
+            schedule.estimates,
+        )
+
+    if args.scores_out:
+        write_scores(args.scores_out, schedule.scores, corpus.filenames, schedule.estimates, schedule.upper_bounds)
+        print(f"Scores saved at: {args.scores_out}")
+
+    if args.profile:  # Slowest pairs are compared again under cProfile, without the pairs cache
+        profiles_directory = path.dirname(path.abspath(args.metrics_out)) if args.metrics_out else results_directory
+        profile_pairs(
+            run_metrics.get_slowest_pairs(args.profile),
+            profiles_directory,
+            corpus.processed_files,
+            corpus.vocabulary,
+            corpus.filenames,
+            args.block_size,
+            args.engine,
+            corpus.files_keys,
+            args.min_score,
+        )
+
+    if args.metrics_out:
+        run_metrics.write(args.metrics_out)
+        print(f"Metrics saved at: {args.metrics_out}")
 
 
 def main() -> None:
@@ -45,19 +313,46 @@ def main() -> None:
 
     Parses command-line arguments to obtain input and output directories and block size for comparison.
     Validates the input directory and checks if there are at least two files for comparison.
-    Processes each file in the input directory, extracting text and handling different file formats.
-    Calculates similarity scores between each pair of processed files using difflib.
-    Generates and writes HTML files with colored comparison results in the specified output directory.
-    Creates a summary results HTML file with links to individual comparisons and opens it in a web browser.
+    Processes each file in the input directory, extracting text and handling different file formats,
+    optionally in several worker processes and reusing words cached by previous runs. Encoded files can be
+    stored in a memory mapped token store so that they are paged in from disk on demand.
+    Files that cannot be processed are reported and skipped.
+    Calculates similarity scores between each unordered pair of processed files using difflib or a
+    suffix automaton, optionally in several worker processes. Identical files score 100 without alignment
+    and alignments cached by previous runs are reused. Pairs can first be pruned with MinHash signatures,
+    pruned pairs get an estimated score and no comparison file. Scores can also come from winnowed
+    fingerprints shared by files, in which case only pairs sharing fingerprints are aligned.
+    In incremental mode, only new or changed files are extracted and compared, results of unchanged
+    pairs are restored from the state directory where all results are written.
+    Compared pairs are appended to a checkpoint file in the output directory as they are compared, so that
+    a run interrupted before its end can be resumed without comparing these pairs again.
+    Generates and writes one HTML file per pair with colored comparison results in the specified output directory,
+    only for pairs reaching the minimum score if one is set. Pairs whose score cannot reach it are not aligned
+    and their cell shows an upper bound of their score.
+    Creates a summary results HTML file with links to individual comparisons and opens it in a web browser,
+    optionally followed by tables of Jaccard similarity or overlapping words of all pairs. Scores can also be
+    exported to a CSV or .npy file.
+    Optionally writes wall and CPU times of each stage and pair, file sizes and peak memory to a JSON
+    metrics file, and cProfile statistics of the slowest pairs.
     Exits the program if the specified path does not exist, or if there are fewer than two files for comparison.
+    With --index_archive or --query, indexes the input directory as an archive or compares the input file with
+    its most similar archived files instead.
     """
 
     args = parse_options()
-    in_dir, out_dir, block_size = args.in_dir, args.out_dir, args.block_size
+    in_dir, out_dir = args.in_dir, args.out_dir
+    jobs = args.jobs if args.jobs > 0 else cpu_count()
 
     if not path.exists(in_dir):
         raise PathNotFoundError(f"The specified path does not exist: {in_dir}")
 
+    if args.index_archive is not None:
+        index_archive(args)
+        return
+    if args.query is not None:
+        query_archive(args)
+        return
+
     if not path.isabs(in_dir):
         in_dir = path.abspath(in_dir)
 
@@ -70,52 +365,43 @@ def main() -> None:
             "Minimum number of files is not present. Please check that there are at least two files to compare."
         )
 
-    filenames, processed_files = [], []
+    if args.incremental is not None:  # Results of previous runs are kept with the state
+        out_dir = args.incremental
+        state: Optional[CorpusState] = CorpusState(args.incremental, get_state_settings(args))
+    else:
+        state = None
 
-    for file in tqdm(files, desc="Processing Files"):
-        file_words = file_extension_call(str(path.join(in_dir, file)))
-        if file_words:  # If all files have supported format
-            processed_files.append(file_words)
-            filenames.append(path.splitext(file)[0])
-        else:
-            raise UnsupportedFileError("Remove files which are not txt, pdf, docx, or odt and run the script again.")
+    run_metrics = RunMetrics()  # Written when --metrics_out or --profile is given
+
+    with run_metrics.stage("extraction"):
+        corpus = extract_corpus(
+            args, [str(path.join(in_dir, file)) for file in sorted(files)], jobs, state, run_metrics
+        )
+
+    if len(corpus.processed_files) < 2:
+        raise MinimumFilesError("Fewer than two files could be processed. Please check the files reported above.")
 
-    if out_dir is not None and path.exists(out_dir):
+    if out_dir is not None and (path.exists(out_dir) or state is not None):
         if not path.isabs(out_dir):
             out_dir = path.abspath(out_dir)
         results_directory = out_dir
     else:
         results_directory = writing_results(datetime.now().strftime("%Y%m%d_%H%M%S"))
 
-    difflib_scores: List[List[float]] = [[] for _ in range(len(processed_files))]
-    file_ind = 0
-
-    for i, text in enumerate(tqdm(processed_files, desc="Comparing Files")):
-        for j, text_bis in enumerate(processed_files):
-            if i != j:
-                difflib_scores[i].append(difflib_overlap(text, text_bis))
-                papers_comparison(
-                    results_directory,
-                    file_ind,
-                    text,
-                    text_bis,
-                    (filenames[i], filenames[j]),
-                    block_size,
-                )
-                file_ind += 1
-            else:
-                difflib_scores[i].append(-1)
+    with run_metrics.stage("scheduling"):
+        schedule = schedule_pairs(args, corpus, results_directory, jobs, state)
 
-    results_directory = path.join(results_directory, "_results.html")
-    print(f"Results saved at: {results_directory}")
+    compare_pairs(args, corpus, schedule, results_directory, jobs, run_metrics)
 
-    results_to_html(difflib_scores, filenames, results_directory)
+    if state is not None:
+        state.save(corpus.filenames, corpus.files_keys, schedule.scores, schedule.compared_pairs, schedule.upper_bounds)
 
-    if wait_for_file(results_directory, 60):  # Wait for file to be created
-        add_links_to_html_table(results_directory)
-        webbrowser.open(results_directory)  # Open results HTML table
-    else:
-        raise RuntimeError("Results file was not created...")
+    write_summary(args, corpus, schedule, results_directory, run_metrics)
+    schedule.checkpoint.remove()  # Results are complete, nothing is left to resume
+
+    import webbrowser  # pylint: disable=import-outside-toplevel
+
+    webbrowser.open(path.join(results_directory, "_results.html"))  # Open results HTML table
 
 
 if __name__ == "__main__":
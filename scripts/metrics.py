@@ -0,0 +1,132 @@
+""" This module measures where the time of a run goes
+
+It records wall and CPU time of each stage of a run.
+It records alignment and rendering times of each pair of files, with their sizes.
+It reads the peak resident memory of the run and of its worker processes.
+It profiles the slowest pairs again with cProfile.
+It writes all measures to a JSON metrics file.
+
+"""
+
+import cProfile
+import json
+import os
+import sys
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, peak memory is then not reported
+    resource = None  # type: ignore
+
+
+class PairTimings(NamedTuple):
+    """Wall and CPU times in seconds of the alignment and the comparison page of a pair of files"""
+
+    align_wall: float
+    align_cpu: float
+    render_wall: float
+    render_cpu: float
+
+
+def get_cpu_time() -> float:
+    """Return CPU time in seconds used by the current process and its terminated child processes"""
+
+    times = os.times()
+
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def get_peak_rss() -> Dict[str, Optional[int]]:
+    """Return peak resident memory in bytes of the current process and of its largest terminated child"""
+
+    if resource is None:
+        return {"self": None, "children": None}
+
+    # Linux reports kilobytes, macOS reports bytes
+    unit = 1 if sys.platform == "darwin" else 1024
+
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit,
+    }
+
+
+class RunMetrics:
+    """Measures of one run, written as JSON
+
+    Stages are timed in the main process, their CPU time includes worker processes once they have
+    terminated. Pair timings are measured where the pair is compared, in a worker or not.
+
+    """
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.files: List[Dict[str, Any]] = []
+        self.pairs: Dict[Tuple[int, int], PairTimings] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the body of the with statement as stage name"""
+
+        wall, cpu = perf_counter(), get_cpu_time()
+        try:
+            yield
+        finally:
+            self.stages[name] = {"wall": perf_counter() - wall, "cpu": get_cpu_time() - cpu}
+
+    def add_file(self, name: str, size: int, words: int) -> None:
+        """Record size in bytes and number of words of a processed file"""
+
+        self.files.append({"name": name, "bytes": size, "words": words})
+
+    def add_pair(self, i: int, j: int, timings: PairTimings) -> None:
+        """Record timings of the pair of files i and j"""
+
+        self.pairs[(i, j)] = timings
+
+    def get_slowest_pairs(self, count: int) -> List[Tuple[int, int]]:
+        """Return the count pairs (i, j) whose alignment and comparison page took the longest"""
+
+        return sorted(self.pairs, key=lambda pair: -(self.pairs[pair].align_wall + self.pairs[pair].render_wall))[
+            :count
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return all measures as a JSON serializable dictionary"""
+
+        pairs = [
+            {
+                "files": [self.files[i]["name"], self.files[j]["name"]],
+                "words": [self.files[i]["words"], self.files[j]["words"]],
+                **timings._asdict(),
+            }
+            for (i, j), timings in sorted(self.pairs.items())
+        ]
+        totals = {
+            field: sum(getattr(timings, field) for timings in self.pairs.values()) for field in PairTimings._fields
+        }
+
+        return {
+            "stages": self.stages,
+            "pairs_totals": totals,
+            "peak_rss": get_peak_rss(),
+            "files": self.files,
+            "pairs": pairs,
+        }
+
+    def write(self, json_path: str) -> None:
+        """Write all measures to a JSON file"""
+
+        with open(json_path, "w", encoding="utf-8") as metrics_file:
+            json.dump(self.to_dict(), metrics_file, indent=2)
+
+
+def profile_call(function: Callable, argument: Any, profile_path: str) -> None:
+    """Call function with argument under cProfile and dump its statistics to profile_path"""
+
+    profiler = cProfile.Profile()
+    profiler.runcall(function, argument)
+    profiler.dump_stats(profile_path)
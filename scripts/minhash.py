@@ -0,0 +1,170 @@
+""" This module finds pairs of files likely to be similar before aligning them
+
+It hashes word shingles of each file.
+It builds MinHash signatures estimating the Jaccard similarity of shingles sets, optionally in worker processes.
+It groups signatures in LSH bands to find candidate pairs without comparing all pairs.
+
+"""
+
+from bisect import bisect_left
+from itertools import combinations
+from multiprocessing import Pool
+from operator import eq
+from random import Random
+from typing import Any, Dict, List, Set, Tuple
+
+from scripts.winnowing import MAX_HASH, get_kgram_hashes
+
+# Mersenne prime used by the universal hash function mixing shingles hashes
+MERSENNE_PRIME = (1 << 61) - 1
+
+# Files and permutations of the signatures computed in the current process, set once by init_worker
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def get_shingles(words: list, shingle_size: int = 5) -> Set[int]:
+    """Return set of 32 bits hashes of all sequences of shingle_size consecutive words"""
+
+    return set(get_kgram_hashes(words, shingle_size))
+
+
+def get_permutations(num_perm: int, seed: int = 1) -> Tuple[Tuple[int, int], List[int]]:
+    """Return (a, b) coefficients of the hash function x -> (a * x + b) mod p and num_perm 32 bits masks
+
+    Shingles hashes are mixed once by the hash function, then each permutation XORs them with its mask.
+
+    """
+
+    rng = Random(seed)
+    mix = (rng.randint(1, MERSENNE_PRIME - 1), rng.randint(0, MERSENNE_PRIME - 1))
+
+    return mix, [rng.getrandbits(32) for _ in range(num_perm)]
+
+
+def get_min_xor(hashes: List[int], mask: int) -> int:
+    """Return the minimum of hash XOR mask over sorted 32 bits hashes
+
+    The minimum is found bit by bit from the highest one, keeping the range of hashes whose bit
+    XOR mask is 0 when there are some, with one bisection per bit instead of a pass over hashes.
+
+    """
+
+    low, high, prefix = 0, len(hashes), 0
+
+    for bit in range(31, -1, -1):
+        # Hashes of [low, high) share their bits above bit with prefix, those with bit set start at split
+        split = bisect_left(hashes, prefix | 1 << bit, low, high)
+        if (mask >> bit & 1 and split < high) or split == low:
+            low, prefix = split, prefix | 1 << bit
+        else:
+            high = split
+
+    return hashes[low] ^ mask
+
+
+def get_signature(shingles: Set[int], permutations: Tuple[Tuple[int, int], List[int]]) -> List[int]:
+    """Return MinHash signature of a non empty shingles set, the minimum of each permutation over the set"""
+
+    (a, b), masks = permutations
+    hashes = sorted(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for x in shingles)
+
+    return [get_min_xor(hashes, mask) for mask in masks]
+
+
+def init_worker(processed_files: list, shingle_size: int, permutations: Tuple[Tuple[int, int], List[int]]) -> None:
+    """Store the files and permutations of the signatures in the current process"""
+
+    _WORKER_STATE.update(processed_files=processed_files, shingle_size=shingle_size, permutations=permutations)
+
+
+def get_file_signature(ind: int) -> List[int]:
+    """Return MinHash signature of file ind of the current process"""
+
+    shingles = get_shingles(_WORKER_STATE["processed_files"][ind], _WORKER_STATE["shingle_size"])
+
+    return get_signature(shingles, _WORKER_STATE["permutations"])
+
+
+def get_signatures(processed_files: list, num_perm: int = 128, shingle_size: int = 5, jobs: int = 1) -> List[list]:
+    """Return MinHash signatures of all files, in a pool of worker processes with more than one job"""
+
+    initargs = (processed_files, shingle_size, get_permutations(num_perm))
+
+    if jobs <= 1 or len(processed_files) <= 1:
+        init_worker(*initargs)
+        return list(map(get_file_signature, range(len(processed_files))))
+
+    # Files are sent once to each worker, each task is only the index of a file
+    chunksize = max(1, min(16, len(processed_files) // (jobs * 4)))
+
+    with Pool(min(jobs, len(processed_files)), initializer=init_worker, initargs=initargs) as pool:
+        return pool.map(get_file_signature, range(len(processed_files)), chunksize)
+
+
+def estimate_similarity(signature1: list, signature2: list) -> float:
+    """Return similarity percentage estimated as the share of equal values in two signatures"""
+
+    equal = sum(map(eq, signature1, signature2))
+
+    return round(equal / len(signature1) * 100, 3)
+
+
+def get_bands(num_perm: int, threshold: float, recall: float) -> Tuple[int, int]:
+    """Return (bands, rows) splitting signatures for LSH
+
+    A pair with a Jaccard similarity s becomes a candidate with probability 1 - (1 - s^rows)^bands.
+    The number of rows is the largest one that still finds pairs at the threshold with at least
+    the requested recall, so that as few dissimilar pairs as possible are candidates.
+
+    """
+
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold**rows) ** bands >= recall:
+            return bands, rows
+
+    return num_perm, 1
+
+
+def get_candidate_pairs(signatures: List[list], bands: int, rows: int) -> Set[Tuple[int, int]]:
+    """Return unordered pairs (i, j) with i < j of signatures sharing at least one LSH band"""
+
+    candidates: Set[Tuple[int, int]] = set()
+
+    for band in range(bands):
+        buckets: Dict[tuple, List[int]] = {}
+        for ind, signature in enumerate(signatures):
+            buckets.setdefault(tuple(signature[band * rows : (band + 1) * rows]), []).append(ind)
+
+        for bucket in buckets.values():
+            candidates.update(combinations(bucket, 2))
+
+    return candidates
+
+
+def prune_pairs(
+    processed_files: list,
+    threshold: float,
+    recall: float = 0.95,
+    num_perm: int = 128,
+    shingle_size: int = 5,
+    jobs: int = 1,
+) -> Tuple[Set[Tuple[int, int]], Dict[Tuple[int, int], float]]:
+    """Return candidate pairs to align and estimated similarity percentages of pruned pairs
+
+    threshold is the Jaccard similarity of shingles sets, between 0 and 1, from which pairs
+    must be found, recall the probability of finding a pair at the threshold. Signatures are
+    computed in jobs worker processes.
+
+    """
+
+    signatures = get_signatures(processed_files, num_perm, shingle_size, jobs)
+    candidates = get_candidate_pairs(signatures, *get_bands(num_perm, threshold, recall))
+
+    estimates = {
+        (i, j): estimate_similarity(signatures[i], signatures[j])
+        for i, j in combinations(range(len(processed_files)), 2)
+        if (i, j) not in candidates
+    }
+
+    return candidates, estimates
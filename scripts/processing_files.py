@@ -1,12 +1,37 @@
 """ This module is used to process text in docx, odt, txt and pdf files """
 
+import codecs
+import mmap
 import re
 import zipfile
+from functools import partial
+from multiprocessing import Pool
 from os import path
+from typing import IO, TYPE_CHECKING, Callable, Iterator, List, Optional, Set, Tuple
+from xml.parsers import expat
 
-from odf import text, teletype
-from odf.opendocument import load
-from pdfminer.high_level import extract_text
+from scripts.cache import WordsCache, get_file_hash
+
+if TYPE_CHECKING:  # Parsers are only imported when a file of their format is read
+    from pdfminer.layout import LAParams, LTItem
+
+# Version of the extraction code of each format, to bump when its words output changes
+EXTRACTORS_VERSIONS = {".pdf": 2, ".docx": 2, ".odt": 2, ".txt": 1}
+
+WORDS_PATTERN = re.compile(r"\w+")
+WORD_CHARACTER_PATTERN = re.compile(r"\w")
+WHITESPACES_PATTERN = re.compile(r"\s+")
+TAGS_PATTERN = re.compile(r"<[^>]*>")
+DOCX_HEADERS_PATTERN = re.compile(r"word/(header|footer)\d*\.xml")
+
+WORD_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+TEXT_NAMESPACE = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+
+# Bytes of a txt file decoded at a time
+TXT_CHUNK_SIZE = 1 << 20
+
+# Bytes of an XML member of a docx or odt file parsed at a time
+XML_CHUNK_SIZE = 1 << 16
 
 
 def get_file_extension(filepath: str) -> str:
@@ -20,13 +45,13 @@ def get_file_extension(filepath: str) -> str:
         raise ValueError(f"File extension error for file: {filepath}")
 
 
-def file_extension_call(file: str) -> list:
-    """Map file extension to appropriate function"""
+def file_extension_call(file: str, pdf_max_pages: int = 0) -> list:
+    """Map file extension to appropriate function, only the first pdf_max_pages pages of pdf files are read if set"""
 
     extension = get_file_extension(file)
 
     if extension == ".pdf":
-        return get_words_from_pdf_file(file)
+        return get_words_from_pdf_file(file, pdf_max_pages)
     elif extension == ".docx":
         return get_words_from_docx_file(file)
     elif extension == ".odt":
@@ -34,63 +59,317 @@ def file_extension_call(file: str) -> list:
     elif extension == ".txt":
         return get_words_from_txt_file(file)
     else:
-        raise ValueError(f"File format not supported for file: {file}. " f"Please convert to pdf, docx, odt, or txt")
+        raise get_format_error(file)
+
+
+def get_format_error(file: str) -> ValueError:
+    """Return the error raised for a file whose format has no extractor"""
+
+    return ValueError(f"File format not supported for file: {file}. " f"Please convert to pdf, docx, odt, or txt")
+
+
+def get_cache_key(file: str, pdf_max_pages: int = 0) -> str:
+    """Return the words cache key of a file from its content hash, extractor type and extractor version"""
+
+    extension = get_file_extension(file)
+    if extension not in EXTRACTORS_VERSIONS:
+        raise get_format_error(file)
+
+    key = f"{get_file_hash(file)}-{extension[1:]}-v{EXTRACTORS_VERSIONS[extension]}"
+
+    if extension == ".pdf" and pdf_max_pages > 0:  # Words of the first pages only
+        key += f"-p{pdf_max_pages}"
+
+    return key
+
+
+def try_get_cache_key(file: str, pdf_max_pages: int = 0) -> Tuple[Optional[str], Optional[str]]:
+    """Return (key, None) with the words cache key of file, or (None, error) where error describes why it has none
+
+    Errors are described as extract_words describes them, so that files are reported the same way.
+
+    """
+
+    try:
+        return get_cache_key(file, pdf_max_pages), None
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        return None, f"{type(error).__name__}: {error}"
+
+
+def extract_words(
+    file: str, cache: Optional[WordsCache] = None, pdf_max_pages: int = 0, key: Optional[str] = None
+) -> Tuple[str, list, Optional[str]]:
+    """Return (file, words, error) where error describes why no words could be extracted from file
+
+    When a cache is given, words of a file already extracted are read from it instead. key is
+    the cache key of file when the caller already computed it, so that file is not hashed again.
+
+    """
+
+    try:
+        if cache is not None and key is None:
+            key = get_cache_key(file, pdf_max_pages)
+        words = cache.get_words(key) if cache is not None and key is not None else None
+
+        if words is None:
+            words = file_extension_call(file, pdf_max_pages)
+            if cache is not None and key is not None and words:
+                cache.put_words(key, words)
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        # Parsers of each format raise their own exceptions, one bad file must not stop the batch
+        return file, [], f"{type(error).__name__}: {error}"
+
+    if not words:
+        return file, [], "no words could be extracted"
+
+    return file, words, None
+
+
+def extract_keyed_words(
+    task: Tuple[str, Optional[str]], cache: Optional[WordsCache] = None, pdf_max_pages: int = 0
+) -> Tuple[str, list, Optional[str]]:
+    """Return extract_words results of a (file, cache key) task, the key is None when it is not known"""
+
+    file, key = task
+
+    return extract_words(file, cache, pdf_max_pages, key)
+
+
+def extract_files(
+    files: list,
+    jobs: int = 1,
+    cache: Optional[WordsCache] = None,
+    pdf_max_pages: int = 0,
+    keys: Optional[List[str]] = None,
+) -> Iterator[Tuple[str, list, Optional[str]]]:
+    """Yield extract_words results for all files, in the order of files
+
+    With more than one job, files are processed in a pool of worker processes.
+    With a cache, unchanged files are not extracted again and the cache is trimmed
+    to its maximum size once all files are processed. keys are the cache keys of files
+    when the caller already computed them.
+
+    """
+
+    extract = partial(extract_keyed_words, cache=cache, pdf_max_pages=pdf_max_pages)
+    files_keys: List[Optional[str]] = list(keys) if keys is not None else [None] * len(files)
+    tasks = list(zip(files, files_keys))
+
+    if jobs <= 1 or len(files) <= 1:
+        yield from map(extract, tasks)
+    else:
+        with Pool(min(jobs, len(files))) as pool:
+            # imap keeps the order of files whatever the order in which workers finish
+            yield from pool.imap(extract, tasks)
+
+    if cache is not None:
+        cache.evict()
+
+
+def render_layout(item: "LTItem", pieces: list) -> None:
+    """Append text of a pdfminer layout item to pieces the way pdfminer TextConverter writes it"""
+
+    from pdfminer.layout import LTContainer, LTText, LTTextBox  # pylint: disable=import-outside-toplevel
 
+    def render(child: "LTItem") -> None:
+        if isinstance(child, LTContainer):
+            for grandchild in child:
+                render(grandchild)
+        elif isinstance(child, LTText):
+            pieces.append(child.get_text())
 
-def get_words_from_pdf_file(pdf_path: str) -> list:
+        if isinstance(child, LTTextBox):
+            pieces.append("\n")
+
+    render(item)
+
+
+def iter_words_from_pdf_file(pdf_path: str, max_pages: int = 0, laparams: Optional["LAParams"] = None) -> Iterator[str]:
+    """Yield words from pdf file at specified path page by page using pdfminer.six
+
+    Only the layout and text of one page are held in memory at a time. max_pages limits the
+    number of pages read (0 reads all pages) and laparams tunes the pdfminer layout analysis.
+
+    """
+
+    from pdfminer.high_level import extract_pages  # pylint: disable=import-outside-toplevel
+
+    for page in extract_pages(pdf_path, maxpages=max_pages, laparams=laparams):
+        pieces: list = []
+        render_layout(page, pieces)
+
+        # Clean up the extracted text
+        cleaned_text = WHITESPACES_PATTERN.sub(" ", "".join(pieces))
+        cleaned_text = TAGS_PATTERN.sub("", cleaned_text)
+
+        # Extract words from the cleaned text
+        yield from WORDS_PATTERN.findall(cleaned_text.lower())
+
+
+def get_words_from_pdf_file(pdf_path: str, max_pages: int = 0, laparams: Optional["LAParams"] = None) -> list:
     """Return list of words from pdf file at specified path using pdfminer.six."""
 
-    # Extract text from the PDF file using pdfminer
-    extracted_text = extract_text(pdf_path)
+    return list(iter_words_from_pdf_file(pdf_path, max_pages, laparams))
+
 
-    # Clean up the extracted text
-    cleaned_text = re.sub(r"\s+", " ", extracted_text)
-    cleaned_text = re.sub(r"<(.|\n)*?>", "", cleaned_text)
+def iter_words_from_txt_file(txt_path: str) -> Iterator[str]:
+    """Yield words from txt file at specified path
 
-    # Extract words from the cleaned text
-    words = re.findall(r"\w+", cleaned_text.lower())
+    The file is memory mapped and decoded TXT_CHUNK_SIZE bytes at a time, the word cut at the
+    end of a chunk is completed with the next one. Memory depends on the size of a chunk, not
+    of the file, and the text is only matched once.
 
-    return words
+    """
+
+    with open(txt_path, "rb") as file:
+        if not path.getsize(txt_path):  # Empty files cannot be memory mapped
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as file_map:
+            decoder = codecs.getincrementaldecoder("utf-8")()
+            rest = ""
+
+            for start in range(0, len(file_map), TXT_CHUNK_SIZE):
+                end = min(start + TXT_CHUNK_SIZE, len(file_map))
+                text = rest + decoder.decode(file_map[start:end], final=end == len(file_map)).lower()
+                words = WORDS_PATTERN.findall(text)
+                rest = ""
+
+                # A chunk ending inside a word, its last word goes on in the next chunk
+                if words and end < len(file_map) and WORD_CHARACTER_PATTERN.match(text[-1]):
+                    rest = words.pop()
+
+                yield from words
 
 
 def get_words_from_txt_file(txt_path: str) -> list:
     """Return list of words from txt file at specified path"""
 
-    words = []
+    return list(iter_words_from_txt_file(txt_path))
+
+
+def iter_xml_texts(
+    xml_file: IO[bytes], text_tags: Set[str], paragraph_tags: Set[str], space_tags: Set[str]
+) -> Iterator[str]:
+    """Yield text between paragraph boundaries of an XML file parsed incrementally with expat
+
+    Tags are namespace URI and local name separated by a space. Only character data inside
+    text_tags is kept, paragraph_tags start and end a new text, even when nested, and
+    space_tags separate words. The file is read in chunks of XML_CHUNK_SIZE bytes and no tree
+    is built, so memory depends on the size of a paragraph, not of the document.
+
+    """
+
+    pieces: List[str] = []
+    texts: List[str] = []
+    depth = 0  # Number of open text_tags elements
+
+    def end_text() -> None:
+        if pieces:
+            texts.append("".join(pieces))
+            pieces.clear()
 
-    with open(txt_path, encoding="utf-8") as file:
-        for line in file:
-            try:
-                for word in line.split():
-                    words.append(word.lower())
-            except (UnicodeError, UnicodeDecodeError):
-                pass
+    def start_element(name: str, _attributes: dict) -> None:
+        nonlocal depth
+        if name in paragraph_tags:
+            end_text()
+        if name in space_tags:
+            pieces.append(" ")
+        if name in text_tags:
+            depth += 1
 
-    str_words = " ".join(map(str, words))
+    def end_element(name: str) -> None:
+        nonlocal depth
+        if name in text_tags:
+            depth -= 1
+        if name in paragraph_tags:
+            end_text()
 
-    return re.findall(r"\w+", str_words)
+    def character_data(data: str) -> None:
+        if depth:
+            pieces.append(data)
+
+    parser = expat.ParserCreate(namespace_separator=" ")
+    parser.buffer_text = True
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    parser.CharacterDataHandler = character_data
+
+    while chunk := xml_file.read(XML_CHUNK_SIZE):
+        parser.Parse(chunk, False)
+        yield from texts
+        texts.clear()
+
+    parser.Parse(b"", True)
+    end_text()
+    yield from texts
+
+
+def iter_words_from_zip_xml(
+    zip_path: str, members: Callable[[List[str]], List[str]], **tags: Set[str]
+) -> Iterator[str]:
+    """Yield words of XML members of a zip file, streamed from the archive one after the other
+
+    members returns the names of the XML members to read, in order, from the names of all members.
+
+    """
+
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in members(archive.namelist()):
+            with archive.open(member) as xml_file:
+                for text in iter_xml_texts(xml_file, **tags):
+                    yield from WORDS_PATTERN.findall(text.lower())
+
+
+def get_docx_members(names: List[str]) -> List[str]:
+    """Return XML parts of a docx file holding text: the body with its tables, notes, then headers and footers"""
+
+    notes = [name for name in ("word/footnotes.xml", "word/endnotes.xml") if name in names]
+    headers = sorted(name for name in names if DOCX_HEADERS_PATTERN.fullmatch(name))
+
+    return ["word/document.xml", *notes, *headers]
+
+
+def get_odt_members(names: List[str]) -> List[str]:
+    """Return XML parts of an odt file holding text: the body with its tables and notes, then headers and footers"""
+
+    return ["content.xml", *(["styles.xml"] if "styles.xml" in names else [])]
+
+
+def iter_words_from_docx_file(docx_path: str) -> Iterator[str]:
+    """Yield words from text runs of docx file at specified path"""
+
+    return iter_words_from_zip_xml(
+        docx_path,
+        get_docx_members,
+        text_tags={f"{WORD_NAMESPACE} t"},
+        paragraph_tags={f"{WORD_NAMESPACE} p"},
+        space_tags={f"{WORD_NAMESPACE} {tag}" for tag in ("tab", "br", "cr")},
+    )
 
 
 def get_words_from_docx_file(docx_path: str) -> list:
     """Return list of words from docx file at specified path"""
 
-    with zipfile.ZipFile(docx_path) as docx:
-        content = docx.read("word/document.xml").decode("utf-8")
-        cleaned = re.sub("<(.|\n)*?>", "", content)
+    return list(iter_words_from_docx_file(docx_path))
 
-    return re.findall(r"\w+", cleaned.lower())
 
+def iter_words_from_odt_file(odt_path: str) -> Iterator[str]:
+    """Yield words from paragraphs and headings of odt file at specified path"""
 
-def get_words_from_odt_file(odt_path: str) -> list:
-    """Return list of words from odt file at specified path"""
+    text_tags = {f"{TEXT_NAMESPACE} p", f"{TEXT_NAMESPACE} h"}
 
-    textdoc = load(odt_path)
-    paragraphs = textdoc.getElementsByType(text.P)
+    return iter_words_from_zip_xml(
+        odt_path,
+        get_odt_members,
+        text_tags=text_tags,
+        # Notes sit inside the paragraph they annotate, their citation must not stick to the previous word
+        paragraph_tags={*text_tags, f"{TEXT_NAMESPACE} note"},
+        space_tags={f"{TEXT_NAMESPACE} {tag}" for tag in ("s", "tab", "line-break")},
+    )
 
-    full_text = str()
 
-    for paragraph in paragraphs:
-        temp = teletype.extractText(paragraph)
-        full_text += temp.lower()
+def get_words_from_odt_file(odt_path: str) -> list:
+    """Return list of words from odt file at specified path"""
 
-    return re.findall(r"\w+", full_text)
+    return list(iter_words_from_odt_file(odt_path))
@@ -0,0 +1,96 @@
+""" This module exports the scores of all pairs of files for other tools
+
+It writes the scores matrix as a CSV file with files names as first row and first column.
+It writes the scores matrix as a NumPy .npy file of 64 bits floats, without needing NumPy.
+It writes scores estimated without aligning files to a separate matrix, as they are on another scale.
+
+"""
+
+import csv
+import struct
+import sys
+from array import array
+from functools import partial
+from math import isnan, nan
+from os import path
+from typing import Callable, List, Optional, Set, Tuple
+
+# Magic string and format version 1.0 of .npy files
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def write_scores_csv(csv_path: str, scores: List[List[float]], filenames: List[str]) -> None:
+    """Write scores matrix to a CSV file, with a header row and a first column of files names
+
+    Missing scores, NaN in the matrix, are written as empty cells.
+
+    """
+
+    with open(csv_path, "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["", *filenames])
+        for name, row in zip(filenames, scores):
+            writer.writerow([name, *("" if isnan(score) else score for score in row)])
+
+
+def write_scores_npy(npy_path: str, scores: List[List[float]]) -> None:
+    """Write scores matrix to a .npy file of little endian 64 bits floats, read with numpy.load"""
+
+    header = f"{{'descr': '<f8', 'fortran_order': False, 'shape': ({len(scores)}, {len(scores)}), }}"
+    # Data must start on a multiple of 64 bytes, the header is padded with spaces and ends with a newline
+    header += " " * (-(len(NPY_MAGIC) + 2 + len(header) + 1) % 64) + "\n"
+
+    values = array("d", (score for row in scores for score in row))
+    if sys.byteorder == "big":
+        values.byteswap()
+
+    with open(npy_path, "wb") as npy_file:
+        npy_file.write(NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin1"))
+        values.tofile(npy_file)
+
+
+def get_part_path(scores_path: str, part: str) -> str:
+    """Return path of the file of the part of the scores, estimates or bounds, written next to scores_path"""
+
+    root, extension = path.splitext(scores_path)
+
+    return f"{root}_{part}{extension}"
+
+
+def write_scores(
+    scores_path: str,
+    scores: List[List[float]],
+    filenames: List[str],
+    estimates: Optional[Set[Tuple[int, int]]] = None,
+    upper_bounds: Optional[Set[Tuple[int, int]]] = None,
+) -> None:
+    """Write scores matrix of filenames to a .csv or .npy file, depending on the extension of scores_path
+
+    Scores of the unordered pairs (i, j) with i < j in estimates or upper_bounds are not
+    similarities of aligned files. They are left out as NaN, or empty CSV cells, and written
+    alone to the files at get_part_path(scores_path, "estimates") and get_part_path(scores_path, "bounds").
+
+    """
+
+    extension = path.splitext(scores_path)[1]
+    write_matrix: Callable[[str, List[List[float]]], None]
+
+    if extension == ".csv":
+        write_matrix = partial(write_scores_csv, filenames=filenames)
+    elif extension == ".npy":
+        write_matrix = write_scores_npy
+    else:
+        raise ValueError(f"Scores file format not supported: {scores_path}. Please use a .csv or .npy file")
+
+    parts = {part: pairs for part, pairs in (("estimates", estimates), ("bounds", upper_bounds)) if pairs}
+    left_out = set().union(*parts.values())
+
+    def get_matrix(pairs: Set[Tuple[int, int]], inside: bool) -> List[List[float]]:
+        return [
+            [score if ((min(i, j), max(i, j)) in pairs) == inside else nan for j, score in enumerate(row)]
+            for i, row in enumerate(scores)
+        ]
+
+    write_matrix(scores_path, get_matrix(left_out, False) if left_out else scores)
+    for part, pairs in parts.items():
+        write_matrix(get_part_path(scores_path, part), get_matrix(pairs, True))
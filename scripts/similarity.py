@@ -2,15 +2,25 @@
 
 It calculates similarity scores with :
 - difflib library to find matching sequences.
+- a suffix automaton to find matching sequences in near linear time.
+- anchors splitting long texts in windows aligned separately.
+- upper bounds of the similarity of two strings to skip aligning them
 - Jaccard Similarity
 - words counting,
 - overlapping words
+- Jaccard Similarity and overlapping words of all pairs of files at once
 
 """
 
 import difflib
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
 
-from scripts.utils import remove_numbers, remove_stop_words, lemmatize
+from scripts.anchoring import get_anchored_matching_blocks
+from scripts.html_utils import filter_matching_blocks
+from scripts.suffix_automaton import get_suffix_matching_blocks
+from scripts.utils import get_lemmatizer, get_stop_words, lemmatize, remove_numbers, remove_stop_words
+from scripts.vocabulary import Vocabulary
 
 
 def difflib_overlap(word_token1: list, word_token2: list) -> float:
@@ -22,14 +32,87 @@ def difflib_overlap(word_token1: list, word_token2: list) -> float:
     return round(seq.ratio() * 100, 3)
 
 
+def difflib_alignment(word_token1: list, word_token2: list, minimum_size: int = 2) -> Tuple[float, list]:
+    """Get similarity percentage and matching blocks of minimum size from a single alignment
+
+    The Sequence Matcher caches its matching blocks, so the ratio and the blocks used for the
+    HTML comparison page are both computed from one alignment of the two strings.
+
+    """
+
+    seq = difflib.SequenceMatcher(a=word_token1, b=word_token2)
+    matching_blocks = filter_matching_blocks(seq.get_matching_blocks(), minimum_size)
+
+    return round(seq.ratio() * 100, 3), matching_blocks
+
+
+def suffix_alignment(word_token1: list, word_token2: list, minimum_size: int = 2) -> Tuple[float, list]:
+    """Get similarity percentage and matching blocks of minimum size found with a suffix automaton
+
+    The percentage is computed like the Sequence Matcher ratio, twice the number of matched words
+    over the total number of words, from matching blocks of any size. Unlike the Sequence Matcher,
+    no word is ignored as junk however long the texts are.
+
+    """
+
+    matching_blocks = get_suffix_matching_blocks(word_token1, word_token2)
+    total = len(word_token1) + len(word_token2)
+    ratio = 2.0 * sum(block.size for block in matching_blocks) / total if total else 1.0
+
+    return round(ratio * 100, 3), filter_matching_blocks(matching_blocks, minimum_size)
+
+
+def anchored_alignment(word_token1: list, word_token2: list, minimum_size: int = 2) -> Tuple[float, list]:
+    """Get similarity percentage and matching blocks of minimum size aligned window by window between anchors
+
+    The percentage is computed like the Sequence Matcher ratio from matching blocks of any size.
+    Windows between anchors are aligned without ignoring any word as junk, so long texts are
+    aligned with a bounded cost per window.
+
+    """
+
+    matching_blocks = get_anchored_matching_blocks(word_token1, word_token2)
+    total = len(word_token1) + len(word_token2)
+    ratio = 2.0 * sum(block.size for block in matching_blocks) / total if total else 1.0
+
+    return round(ratio * 100, 3), filter_matching_blocks(matching_blocks, minimum_size)
+
+
+def get_ratio_upper_bound(word_token1: list, word_token2: list, minimum: float = 100.0) -> float:
+    """Get upper bound of the similarity percentage of any alignment, without aligning the strings
+
+    The bound is first computed from the lengths only, like the Sequence Matcher real_quick_ratio,
+    then from the words both strings share counting repetitions, like quick_ratio, if the first
+    bound reaches minimum. No alignment can match more words than both strings share.
+
+    """
+
+    total = len(word_token1) + len(word_token2)
+    if not total:
+        return 100.0
+
+    bound = round(2.0 * min(len(word_token1), len(word_token2)) / total * 100, 3)
+    if bound < minimum:
+        return bound
+
+    shared = sum((Counter(word_token1) & Counter(word_token2)).values())
+
+    return round(2.0 * shared / total * 100, 3)
+
+
+# Alignment functions selectable from the command line
+ENGINES: Dict[str, Callable[..., Tuple[float, list]]] = {
+    "difflib": difflib_alignment,
+    "suffix": suffix_alignment,
+    "anchored": anchored_alignment,
+}
+
+
 def calculate_overlap(word_token1: list, word_token2: list) -> float:
     """Get similarity percentage from usage of similar words in two strings"""
 
-    overlapping_words = []
-
-    for word in word_token1:
-        if word in word_token2:
-            overlapping_words.append(word)
+    words2 = set(word_token2)
+    overlapping_words = [word for word in word_token1 if word in words2]
 
     overlap_percentage = len(overlapping_words) / len(word_token1) * 100
 
@@ -39,20 +122,117 @@ def calculate_overlap(word_token1: list, word_token2: list) -> float:
 def calculate_jaccard(word_tokens1: list, word_tokens2: list) -> float:
     """Calculates intersection over union and return Jaccard similarity score"""
 
+    stop_words, lemmatizer = get_stop_words(), get_lemmatizer()
     list1, list2 = remove_numbers(word_tokens1), remove_numbers(word_tokens2)
-    list1, list2 = remove_stop_words(list1), remove_stop_words(list2)
-    list1, list2 = lemmatize(list1), lemmatize(list2)
+    list1, list2 = remove_stop_words(list1, stop_words), remove_stop_words(list2, stop_words)
+    set1, set2 = set(lemmatize(list1, lemmatizer)), set(lemmatize(list2, lemmatizer))
+
+    jaccard_score = len(set1 & set2) / len(set1 | set2)
 
-    # Combine both tokens to find union
-    both_tokens = list1 + list2
-    union = set(both_tokens)
+    return round(jaccard_score, 3)
 
-    # Calculate intersection
-    intersection = set()
-    for word in list1:
-        if word in list2:
-            intersection.add(word)
 
-    jaccard_score = len(intersection) / len(union)
+def get_terms_bitsets(processed_files: list, terms: Optional[List[Optional[int]]] = None) -> List[int]:
+    """Return one integer per file whose set bits are the terms of the file
 
-    return round(jaccard_score, 3)
+    Files are lists of words identifiers. When terms is given, identifier k stands for term
+    terms[k] and is left out when terms[k] is None.
+
+    """
+
+    bitsets = []
+
+    for words in processed_files:
+        word_ids = set(words) if terms is None else {terms[word_id] for word_id in set(words)} - {None}
+        bitset = 0
+        for term in word_ids:
+            bitset |= 1 << term
+        bitsets.append(bitset)
+
+    return bitsets
+
+
+def get_normalized_terms(vocabulary: Vocabulary) -> List[Optional[int]]:
+    """Return term of each word of vocabulary as calculate_jaccard normalizes it, None for removed words
+
+    Each distinct word of the corpus is looked up in the stop words and lemmatized once, words
+    having the same lemma get the same term.
+
+    """
+
+    stop_words, lemmatizer = get_stop_words(), get_lemmatizer()
+    lemmas: Dict[str, int] = {}
+    terms: List[Optional[int]] = []
+
+    for word in vocabulary.words:
+        if isinstance(word, (int, float)) or str(word).lower() in stop_words:
+            terms.append(None)
+        else:
+            terms.append(lemmas.setdefault(lemmatizer.lemmatize(word), len(lemmas)))
+
+    return terms
+
+
+def jaccard_matrix(processed_files: list, vocabulary: Vocabulary) -> List[List[float]]:
+    """Return Jaccard similarity score of every pair of files encoded with vocabulary
+
+    Scores are the ones of calculate_jaccard on the decoded words, from 0 to 1, with -1 on the
+    diagonal. Sets of terms of files are stored as integers, so the intersection of a pair is
+    a single bitwise and. Files without any term have a score of 0.
+
+    """
+
+    bitsets = get_terms_bitsets(processed_files, get_normalized_terms(vocabulary))
+    sizes = [bitset.bit_count() for bitset in bitsets]
+    matrix: List[List[float]] = [[-1] * len(bitsets) for _ in range(len(bitsets))]
+
+    for i, bitset in enumerate(bitsets):
+        for j in range(i + 1, len(bitsets)):
+            intersection = (bitset & bitsets[j]).bit_count()
+            union = sizes[i] + sizes[j] - intersection
+            matrix[i][j] = matrix[j][i] = round(intersection / union, 3) if union else 0.0
+
+    return matrix
+
+
+def overlap_matrix(processed_files: list) -> List[List[float]]:
+    """Return overlap percentage of every file i with every other file j in matrix[i][j]
+
+    Scores are the ones of calculate_overlap, with -1 on the diagonal, and are not symmetric.
+    Bit b of the count of each word in file i is stored in a bitset of words, so the words of
+    file i found in file j are counted with one bitwise and per bit of the largest count. Empty
+    files have a score of 0.
+
+    """
+
+    words_bitsets = get_terms_bitsets(processed_files)
+    matrix: List[List[float]] = [[-1] * len(processed_files) for _ in range(len(processed_files))]
+
+    for i, words in enumerate(processed_files):
+        counts_bitsets: List[int] = []  # Bitset of the words whose count has bit b set, for each b
+        for word_id, count in Counter(words).items():
+            for bit in range(count.bit_length()):
+                if bit == len(counts_bitsets):
+                    counts_bitsets.append(0)
+                if count >> bit & 1:
+                    counts_bitsets[bit] |= 1 << word_id
+
+        for j, bitset in enumerate(words_bitsets):
+            if i != j:
+                overlapping = sum((counts & bitset).bit_count() << bit for bit, counts in enumerate(counts_bitsets))
+                matrix[i][j] = round(overlapping / len(words) * 100, 3) if len(words) else 0.0
+
+    return matrix
+
+
+# Scores of all pairs selectable from the command line, with their title in the results
+METRICS = {"jaccard": "Jaccard similarity", "overlap": "Overlapping words (%)"}
+
+
+def get_metric_matrix(metric: str, processed_files: list, vocabulary: Vocabulary) -> List[List[float]]:
+    """Return matrix of scores of metric, a key of METRICS, for files encoded with vocabulary"""
+
+    if metric == "jaccard":
+        return jaccard_matrix(processed_files, vocabulary)
+
+    return overlap_matrix(processed_files)
@@ -0,0 +1,195 @@
+""" This module finds matching blocks between two texts with a suffix automaton
+
+It builds the suffix automaton of the second text in linear time.
+It finds the longest runs of words of the first text that also appear in the second text.
+It selects non overlapping blocks, longest first, like difflib Sequence Matcher does.
+
+"""
+
+import heapq
+from bisect import bisect_right, insort
+from difflib import Match
+from typing import Dict, Hashable, List, Tuple
+
+# Number of times gaps between selected blocks are searched for more blocks
+GAP_PASSES = 3
+
+
+class SuffixAutomaton:
+    """Suffix automaton of a words sequence
+
+    Each state stands for a set of substrings sharing the same end positions in the sequence.
+    first_end is the end position of the first occurrence of the substrings of each state.
+
+    """
+
+    def __init__(self, words: list) -> None:
+        self.transitions: List[Dict] = [{}]
+        self.links: List[int] = [-1]
+        self.lengths: List[int] = [0]
+        self.first_end: List[int] = [-1]
+
+        last = 0
+        for position, word in enumerate(words):
+            last = self.extend(last, word, position)
+
+    def add_state(self, length: int, first_end: int, transitions: Dict, link: int = -1) -> int:
+        """Return index of a new state"""
+
+        self.transitions.append(transitions)
+        self.links.append(link)
+        self.lengths.append(length)
+        self.first_end.append(first_end)
+
+        return len(self.lengths) - 1
+
+    def extend(self, last: int, word: Hashable, position: int) -> int:
+        """Add word at position to the automaton whose last state is last and return the new last state"""
+
+        transitions, links, lengths = self.transitions, self.links, self.lengths
+        current = self.add_state(lengths[last] + 1, position, {})
+
+        state = last
+        while state != -1 and word not in transitions[state]:
+            transitions[state][word] = current
+            state = links[state]
+
+        if state == -1:
+            links[current] = 0
+            return current
+
+        target = transitions[state][word]
+        if lengths[state] + 1 == lengths[target]:
+            links[current] = target
+            return current
+
+        # Split target so that the new state only holds substrings ending at position
+        clone = self.add_state(lengths[state] + 1, self.first_end[target], dict(transitions[target]), links[target])
+        while state != -1 and transitions[state].get(word) == target:
+            transitions[state][word] = clone
+            state = links[state]
+
+        links[target] = links[current] = clone
+
+        return current
+
+    def get_longest_matches(self, words: list) -> List[Tuple[int, int, int]]:
+        """Return (i, j, size) of the runs of words that cannot be extended to the right
+
+        For each position of words where a match ends, words[i:i + size] is the longest run
+        ending there that also appears in the automaton sequence, at position j.
+
+        """
+
+        transitions, links, lengths, first_end = self.transitions, self.links, self.lengths, self.first_end
+        matches: List[Tuple[int, int, int]] = []
+        state, size = 0, 0
+
+        for position, word in enumerate(words):
+            next_state, next_size = state, size
+            while next_state and word not in transitions[next_state]:
+                next_state = links[next_state]
+                next_size = lengths[next_state]
+
+            if word in transitions[next_state]:
+                next_state = transitions[next_state][word]
+                next_size += 1
+            else:
+                next_state, next_size = 0, 0
+
+            # Previous run could not be extended with this word, it is a maximal run
+            if size and next_size != size + 1:
+                matches.append((position - size, first_end[state] - size + 1, size))
+
+            state, size = next_state, next_size
+
+        if size:
+            matches.append((len(words) - size, first_end[state] - size + 1, size))
+
+        return matches
+
+
+def select_blocks(words_list1: list, words_list2: list, minimum_size: int) -> List[Tuple[int, int, int]]:
+    """Return non overlapping (i, j, size) blocks increasing in both lists, selected longest first
+
+    Candidates are the longest runs found by the suffix automaton of words_list2, at their first
+    occurrence in words_list2. A candidate overlapping blocks already selected is clipped to fit
+    between them and tried again with its new size.
+
+    """
+
+    candidates = [(-size, i, j) for i, j, size in SuffixAutomaton(words_list2).get_longest_matches(words_list1) if size]
+    heapq.heapify(candidates)
+
+    starts: List[int] = []  # Selected blocks sorted by position in words_list1
+    blocks: List[Tuple[int, int, int]] = []
+
+    while candidates:
+        size, i, j = heapq.heappop(candidates)
+        size = -size
+        if size < minimum_size:
+            break
+
+        # Gap between selected blocks in which the candidate starts
+        ind = bisect_right(starts, i)
+        low_i, low_j = (
+            (blocks[ind - 1][0] + blocks[ind - 1][2], blocks[ind - 1][1] + blocks[ind - 1][2]) if ind else (0, 0)
+        )
+        high_i, high_j = (blocks[ind][0], blocks[ind][1]) if ind < len(blocks) else (len(words_list1), len(words_list2))
+
+        # Clip candidate to the gap in both lists, staying on the same diagonal
+        start = max(i, low_i, i + low_j - j)
+        end = min(i + size, high_i, i + high_j - j)
+
+        if end - start == size:
+            insort(starts, i)
+            blocks.insert(ind, (i, j, size))
+        elif end - start >= minimum_size:
+            heapq.heappush(candidates, (start - end, start, j + start - i))
+
+    return blocks
+
+
+def get_suffix_matching_blocks(words_list1: list, words_list2: list, minimum_size: int = 1) -> list:
+    """Return matching blocks of at least minimum_size words between two words lists
+
+    Blocks are difflib Match triples (a, b, size), increasing in both a and b, followed by the
+    sentinel Match(len(a), len(b), 0) as returned by get_matching_blocks. Gaps left between
+    selected blocks are searched again, up to GAP_PASSES times, for runs that only appear
+    later in words_list2. Each pass takes near linear time in the size of both lists.
+
+    """
+
+    blocks: List[Tuple[int, int, int]] = []
+    gaps = [(0, len(words_list1), 0, len(words_list2))]
+
+    for _ in range(GAP_PASSES):
+        new_gaps = []
+
+        for low_i, high_i, low_j, high_j in gaps:
+            if high_i - low_i < minimum_size or high_j - low_j < minimum_size:
+                continue
+
+            gap_blocks = select_blocks(words_list1[low_i:high_i], words_list2[low_j:high_j], minimum_size)
+            gap_blocks = [(i + low_i, j + low_j, size) for i, j, size in gap_blocks]
+            blocks.extend(gap_blocks)
+
+            # Gaps left inside this gap for the next pass
+            for i, j, size in gap_blocks + [(high_i, high_j, 0)]:
+                if i > low_i and j > low_j and gap_blocks:
+                    new_gaps.append((low_i, i, low_j, j))
+                low_i, low_j = i + size, j + size
+
+        if not new_gaps:
+            break
+        gaps = new_gaps
+
+    # Merge adjacent blocks as difflib does
+    merged: List[Tuple[int, int, int]] = []
+    for i, j, size in sorted(blocks):
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+        else:
+            merged.append((i, j, size))
+
+    return [Match(i, j, size) for i, j, size in merged] + [Match(len(words_list1), len(words_list2), 0)]
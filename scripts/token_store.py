@@ -0,0 +1,106 @@
+""" This module stores encoded files on disk for corpora larger than memory
+
+It appends arrays of words identifiers of all files to a single binary file.
+It writes an index of the offset of each file in the binary file.
+It memory maps the binary file so that files are paged in on demand.
+
+"""
+
+import mmap
+from array import array
+from os import makedirs, path
+from typing import BinaryIO, Dict, Iterator, Optional
+
+from scripts.vocabulary import TYPE_CODE
+
+TOKENS_FILE = "tokens.bin"
+OFFSETS_FILE = "offsets.bin"
+
+# Type code of the offsets index, 8 bytes per file
+OFFSETS_TYPE_CODE = "q"
+
+
+class TokenStoreWriter:
+    """Writes arrays of words identifiers one after the other in a token store directory"""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+        if not path.exists(directory):
+            makedirs(directory)
+
+        self.tokens_file: BinaryIO = open(path.join(directory, TOKENS_FILE), "wb")  # pylint: disable=R1732
+        self.offsets = array(OFFSETS_TYPE_CODE, [0])  # Start of each file then end of the last one, in words
+
+    def append(self, word_ids: array) -> None:
+        """Append array of words identifiers of the next file"""
+
+        self.tokens_file.write(word_ids.tobytes())
+        self.offsets.append(self.offsets[-1] + len(word_ids))
+
+    def close(self) -> "TokenStore":
+        """Write the offsets index and return the store of all appended files"""
+
+        self.tokens_file.close()
+
+        with open(path.join(self.directory, OFFSETS_FILE), "wb") as offsets_file:
+            self.offsets.tofile(offsets_file)
+
+        return TokenStore(self.directory)
+
+
+class TokenStore:
+    """Files of a token store directory, read only
+
+    Indexing the store returns the words identifiers of a file as a memoryview of the memory
+    mapped tokens file, which supports len, indexing, slicing and iteration like an array.
+    Pages of a file are only read from disk when they are accessed and can be dropped by the
+    system under memory pressure. Only the path of the store is pickled, so a store is cheap to
+    send to worker processes, which map the file again.
+
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.offsets = array(OFFSETS_TYPE_CODE)
+
+        with open(path.join(directory, OFFSETS_FILE), "rb") as offsets_file:
+            self.offsets.frombytes(offsets_file.read())
+
+        self.tokens_file: Optional[BinaryIO] = None
+        self.tokens_map: Optional[mmap.mmap] = None
+        self.tokens = memoryview(b"").cast(TYPE_CODE)
+
+        if self.offsets[-1]:  # Empty files cannot be memory mapped
+            self.tokens_file = open(path.join(directory, TOKENS_FILE), "rb")  # pylint: disable=R1732
+            self.tokens_map = mmap.mmap(self.tokens_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.tokens = memoryview(self.tokens_map).cast(TYPE_CODE)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, ind: int) -> memoryview:
+        if not -len(self) <= ind < len(self):
+            raise IndexError("token store index out of range")
+
+        ind %= len(self)
+
+        return self.tokens[self.offsets[ind] : self.offsets[ind + 1]]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        return (self[ind] for ind in range(len(self)))
+
+    def __getstate__(self) -> Dict[str, str]:
+        return {"directory": self.directory}
+
+    def __setstate__(self, state: Dict[str, str]) -> None:
+        self.__init__(state["directory"])  # type: ignore[misc]  # pylint: disable=unnecessary-dunder-call
+
+    def close(self) -> None:
+        """Unmap the tokens file, views of files returned by the store must not be used anymore"""
+
+        self.tokens.release()
+        if self.tokens_map is not None:
+            self.tokens_map.close()
+        if self.tokens_file is not None:
+            self.tokens_file.close()
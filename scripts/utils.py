@@ -2,18 +2,19 @@
 
 It verifies if value is float different from - 1
 It prints similarity results in a pretty table in console
-It waits for file creation
+It schedules unordered pairs of files for comparison
+It parses command-line arguments of the comparison and of the archive index and queries
 It can lemmatize, remove stop words, remove numbers for text processing
 
 """
 
 import argparse
+from functools import lru_cache
 from os import path, listdir
-from time import sleep
-from typing import Any
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+if TYPE_CHECKING:  # NLTK is only imported when words are lemmatized or stop words removed
+    from nltk.stem import WordNetLemmatizer
 
 
 def parse_options():
@@ -21,7 +22,7 @@ def parse_options():
     Parses command-line arguments for the script.
 
     This function sets up an argument parser for the script, specifying the required input directory
-    and optional output directory and block size arguments.
+    and optional arguments for output, comparison, performance and pruning of pairs.
 
     Args:
     None
@@ -29,10 +30,27 @@ def parse_options():
     Returns:
     argparse.Namespace: The parsed command-line arguments, where 'in_dir' is the input directory,
     'out_dir' is the optional output directory, and 'block_size' is the optional minimum number of
-    consecutive similar words for block comparison (default is 2).
+    consecutive similar words for block comparison (default is 2). The other arguments are:
+    - 'jobs': number of worker processes (default is 1, 0 uses all CPUs)
+    - 'pdf_max_pages': maximum number of pages read from pdf files (default is 0, all pages)
+    - 'engine': algorithm finding matching blocks (default is difflib)
+    - 'min_score': minimum similarity percentage of pairs with a comparison file (default is 0)
+    - 'metric': optional list of other scores written in the results (jaccard, overlap)
+    - 'incremental': optional state directory of incremental runs
+    - 'resume': resume the run interrupted in the output directory from its checkpoint
+    - 'scores_out': optional .csv or .npy file the scores matrix is exported to
+    - 'cache_dir', 'cache_size': optional cache directory of words and alignments, and maximum size in MB of
+      each (default is 512)
+    - 'token_store': optional directory of the memory mapped token store of processed files
+    - 'metrics_out', 'profile': optional JSON metrics file and number of slowest pairs profiled (default is 0)
+    - 'lsh_threshold', 'lsh_recall', 'lsh_permutations', 'shingle_size': optional MinHash pruning of pairs
+    - 'winnowing', 'kgram_size', 'window_size': optional scoring of pairs from shared fingerprints
+    - 'index_archive': optional index directory the files of the input directory are indexed into
+    - 'query', 'top': optional index directory of the archive the input file is compared with, and number
+      of most similar archived files compared (default is 10)
     """
     parser = argparse.ArgumentParser()
-    parser.add_argument("in_dir", type=str, help="input directory for text files")
+    parser.add_argument("in_dir", type=str, help="input directory for text files, or input file with --query")
     parser.add_argument("-o", "--out_dir", type=str, help="output directory for html results files")
     parser.add_argument(
         "-s",
@@ -40,8 +58,160 @@ def parse_options():
         type=int,
         help="minimum number of consecutive and " "similar words detected (default=2)",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to compare files (default=1, 0 uses all CPUs)",
+    )
+    parser.add_argument(
+        "--pdf_max_pages",
+        type=int,
+        default=0,
+        help="maximum number of pages read from each pdf file (default=0, reads all pages)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["difflib", "suffix", "anchored"],
+        default="difflib",
+        help="algorithm finding matching blocks, suffix finds them in near linear time on long files, anchored "
+        "aligns long files window by window between unique shared runs of words (default=difflib)",
+    )
+    parser.add_argument(
+        "--min_score",
+        type=float,
+        default=0.0,
+        help="only write comparison files of pairs whose similarity reaches this percentage, pairs whose "
+        "similarity cannot reach it are not aligned (default=0, all pairs)",
+    )
+    parser.add_argument(
+        "--metric",
+        action="append",
+        choices=["jaccard", "overlap"],
+        help="also write the table of this score of all pairs of files in the results, can be repeated",
+    )
+    parser.add_argument(
+        "--incremental",
+        type=str,
+        metavar="STATE_DIR",
+        help="keep files, scores and comparison files in this directory to only compare new or changed files "
+        "on later runs, results are written there",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip pairs already compared by the interrupted run checkpointed in the output directory, "
+        "with the same files and options",
+    )
+    parser.add_argument(
+        "--scores_out",
+        type=str,
+        help="also export the scores matrix to this .csv or .npy file",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        help="directory where words extracted from files and alignments of pairs are cached between runs "
+        "(default=no cache)",
+    )
+    parser.add_argument(
+        "--cache_size",
+        type=int,
+        default=512,
+        help="maximum size in MB of the words and of the alignments in the cache directory (default=512)",
+    )
+    parser.add_argument(
+        "--token_store",
+        type=str,
+        metavar="STORE_DIR",
+        help="write processed files to a memory mapped token store in this directory instead of keeping them "
+        "in memory, for corpora larger than memory (default=in memory)",
+    )
+    parser.add_argument(
+        "--metrics_out",
+        type=str,
+        help="write wall and CPU times of each stage and pair, file sizes and peak memory to this JSON file",
+    )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        default=0,
+        metavar="N",
+        help="compare the N slowest pairs again under cProfile and write their statistics next to the metrics "
+        "file, or in the results directory (default=0)",
+    )
+    pruning = parser.add_mutually_exclusive_group()
+    pruning.add_argument(
+        "--lsh_threshold",
+        type=float,
+        help="only align pairs whose estimated shingles Jaccard similarity may reach this threshold "
+        "between 0 and 1, other pairs get an estimated score (default=align all pairs)",
+    )
+    pruning.add_argument(
+        "--winnowing",
+        action="store_true",
+        help="score all pairs from their shared winnowed fingerprints and only align pairs sharing some "
+        "to write their comparison file",
+    )
+    parser.add_argument(
+        "--lsh_recall",
+        type=float,
+        default=0.95,
+        help="probability of aligning a pair at the LSH threshold (default=0.95)",
+    )
+    parser.add_argument(
+        "--lsh_permutations",
+        type=int,
+        default=128,
+        help="number of MinHash permutations used to estimate similarities (default=128)",
+    )
+    parser.add_argument(
+        "--shingle_size",
+        type=int,
+        default=5,
+        help="number of consecutive words in a shingle (default=5)",
+    )
+    parser.add_argument(
+        "--kgram_size",
+        type=int,
+        default=5,
+        help="number of consecutive words hashed for winnowing fingerprints (default=5)",
+    )
+    parser.add_argument(
+        "--window_size",
+        type=int,
+        default=4,
+        help="number of consecutive hashes in a winnowing window (default=4)",
+    )
+    archive = parser.add_mutually_exclusive_group()
+    archive.add_argument(
+        "--index_archive",
+        type=str,
+        metavar="INDEX_DIR",
+        help="index the files of the input directory in this directory instead of comparing them, only new or "
+        "changed files are indexed again",
+    )
+    archive.add_argument(
+        "--query",
+        type=str,
+        metavar="INDEX_DIR",
+        help="compare the input file with its most similar files of the archive indexed in this directory",
+    )
+    parser.add_argument(
+        "-k", "--top", type=int, default=10, help="number of most similar archived files compared (default=10)"
+    )
 
-    return parser.parse_args()
+    args = parser.parse_args()
+
+    # Checked before the run rather than when the scores are exported at its end
+    if args.scores_out is not None and path.splitext(args.scores_out)[1] not in (".csv", ".npy"):
+        parser.error("--scores_out must be a .csv or .npy file")
+    if args.resume and not path.isdir(args.incremental or args.out_dir or ""):
+        # Without it, results would go to a new timestamped directory with nothing to resume
+        parser.error("--resume needs the output directory of the interrupted run, given with -o or --incremental")
+
+    return args
 
 
 def is_float(value: Any) -> bool:
@@ -79,26 +249,27 @@ def pretty_table(scores: list, names: list) -> None:
         print(row_format.format(name, *row))
 
 
-def wait_for_file(file_path: str, timeout: int = 10) -> bool:
-    """Wait for the creation of a specific file.
+def get_filename(file_path: str) -> str:
+    """Return name of the file at specified path without its directory and extension"""
 
-    This method checks if the specified file exists and waits for it to
-    appear during the specified amount of time (by default 10 seconds).
+    return path.splitext(path.basename(file_path))[0]
 
-    filepath[in]    Fullpath to the file to wait for
-    timeout[in]     Time to wait in seconds (by default 10 seconds).
-    """
 
-    attempts = 0
-    while attempts < timeout:
-        # Check if the file exists.
-        if path.isfile(file_path):
-            return True
-        # Wait 1 second before trying again.
-        sleep(1)
-        attempts += 1
+def get_pairs(count: int) -> List[Tuple[int, int]]:
+    """Return all unordered pairs (i, j) with i < j of count files, in comparison order"""
+
+    return [(i, j) for i in range(count) for j in range(i + 1, count)]
+
+
+def get_pair_index(i: int, j: int, count: int) -> int:
+    """Return the position of the unordered pair (i, j) in the list returned by get_pairs"""
+
+    if i == j:
+        raise ValueError(f"A file cannot be paired with itself: {i}")
+
+    i, j = min(i, j), max(i, j)
 
-    return False
+    return i * count - i * (i + 1) // 2 + j - i - 1
 
 
 def remove_numbers(words_list: list) -> list:
@@ -108,17 +279,37 @@ def remove_numbers(words_list: list) -> list:
     return [w for w in temp if not isinstance(w, float)]
 
 
-def remove_stop_words(words_list: list) -> list:
-    """Remove stop words from strings list"""
+@lru_cache(maxsize=None)
+def get_stop_words() -> frozenset:
+    """Return English stop words, loaded once per process"""
+
+    from nltk.corpus import stopwords  # pylint: disable=import-outside-toplevel
+
+    return frozenset(stopwords.words("english"))
+
+
+@lru_cache(maxsize=None)
+def get_lemmatizer() -> "WordNetLemmatizer":
+    """Return WordNet lemmatizer, built once per process"""
+
+    from nltk.stem import WordNetLemmatizer  # pylint: disable=import-outside-toplevel
+
+    return WordNetLemmatizer()
+
+
+def remove_stop_words(words_list: list, stop_words: Optional[frozenset] = None) -> list:
+    """Remove stop words from strings list, English stop words are used if none are given"""
 
-    en_stop_words = set(stopwords.words("english"))
+    if stop_words is None:
+        stop_words = get_stop_words()
 
-    return [w for w in words_list if str(w).lower() not in en_stop_words]
+    return [w for w in words_list if str(w).lower() not in stop_words]
 
 
-def lemmatize(words_list: list) -> list:
-    """Return lemmatized words list"""
+def lemmatize(words_list: list, lemmatizer: Optional["WordNetLemmatizer"] = None) -> list:
+    """Return lemmatized words list, the shared WordNet lemmatizer is used if none is given"""
 
-    lemmatizer = WordNetLemmatizer()
+    if lemmatizer is None:
+        lemmatizer = get_lemmatizer()
 
     return [lemmatizer.lemmatize(w) for w in words_list]
@@ -0,0 +1,57 @@
+""" This module stores words of all processed files as integers
+
+It maps each distinct word of the corpus to an integer identifier.
+It encodes words lists as compact arrays of identifiers.
+It decodes arrays of identifiers back to words for HTML rendering.
+
+"""
+
+from array import array
+from typing import Dict, List, Optional
+
+# Type code of signed int arrays, 4 bytes per word on all supported platforms
+TYPE_CODE = "i"
+
+
+class Vocabulary:
+    """Corpus wide mapping between words and integer identifiers
+
+    Encoded files take 4 bytes per word and compare faster, as the Sequence Matcher hashes
+    small integers instead of strings. Identifiers only make sense within one vocabulary.
+
+    """
+
+    def __init__(self, words: Optional[List[str]] = None) -> None:
+        self.words: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+        for word in words or []:
+            self.add(word)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def add(self, word: str) -> int:
+        """Return identifier of word, adding it to the vocabulary if it is new"""
+
+        word_id = self.ids.get(word)
+
+        if word_id is None:
+            word_id = self.ids[word] = len(self.words)
+            self.words.append(word)
+
+        return word_id
+
+    def encode(self, words: list) -> array:
+        """Return array of identifiers of words list"""
+
+        add = self.add
+
+        return array(TYPE_CODE, [add(word) for word in words])
+
+    def decode(self, word_ids: array) -> list:
+        """Return words list of array of identifiers"""
+
+        words = self.words
+
+        return [words[word_id] for word_id in word_ids]
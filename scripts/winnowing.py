@@ -0,0 +1,133 @@
+""" This module scores all pairs of files from their shared fingerprints
+
+It hashes all sequences of k consecutive words of each file.
+It keeps a small set of fingerprints per file with winnowing.
+It builds an inverted index from fingerprints to files.
+It counts fingerprints shared by each pair of files in a single pass over the index.
+It computes fingerprints from words text, the same in every run, for persistent indexes.
+
+"""
+
+import zlib
+from collections import deque
+from itertools import combinations
+from typing import Deque, Dict, List, Set, Tuple
+
+MAX_HASH = (1 << 32) - 1
+
+
+def get_kgram_hashes(words: list, kgram_size: int = 5) -> List[int]:
+    """Return 32 bits hashes of all sequences of kgram_size consecutive words, in order
+
+    Words are expected as integer identifiers, whose tuples hash the same way within a run.
+    A file shorter than kgram_size words has one hash for all its words.
+
+    """
+
+    if len(words) <= kgram_size:
+        return [hash(tuple(words)) & MAX_HASH]
+
+    return [hash(tuple(words[ind : ind + kgram_size])) & MAX_HASH for ind in range(len(words) - kgram_size + 1)]
+
+
+def winnow(hashes: List[int], window_size: int = 4) -> Set[int]:
+    """Return fingerprints selected by winnowing from hashes
+
+    The minimum hash of each window of window_size consecutive hashes is selected, the rightmost
+    one in case of ties. Any run of window_size + kgram_size - 1 words shared by two files is
+    then guaranteed to give them at least one shared fingerprint.
+
+    """
+
+    if len(hashes) <= window_size:
+        return {min(hashes)} if hashes else set()
+
+    fingerprints: Set[int] = set()
+    window: Deque[int] = deque()  # Positions of increasing hashes, candidates to be the window minimum
+
+    for position, value in enumerate(hashes):
+        while window and hashes[window[-1]] >= value:
+            window.pop()
+        window.append(position)
+
+        if window[0] <= position - window_size:
+            window.popleft()
+
+        if position >= window_size - 1:
+            fingerprints.add(hashes[window[0]])
+
+    return fingerprints
+
+
+def get_stable_kgram_hashes(words: list, kgram_size: int = 5) -> List[int]:
+    """Return CRC32 of the text of all sequences of kgram_size consecutive words, in order
+
+    Unlike the builtin hash, CRC32 is the same on every platform and Python version.
+    A file shorter than kgram_size words has one hash for all its words.
+
+    """
+
+    texts = [str(word) for word in words]
+
+    if len(texts) <= kgram_size:
+        return [zlib.crc32(" ".join(texts).encode("utf-8"))]
+
+    return [
+        zlib.crc32(" ".join(texts[ind : ind + kgram_size]).encode("utf-8"))
+        for ind in range(len(texts) - kgram_size + 1)
+    ]
+
+
+def get_stable_fingerprints(words: list, kgram_size: int = 5, window_size: int = 4) -> Set[int]:
+    """Return winnowed fingerprints of a words list that do not depend on the run or the corpus
+
+    k-grams are hashed from the text of their words instead of the identifiers of the words in a
+    vocabulary, so that fingerprints computed by different runs can be compared.
+
+    """
+
+    return winnow(get_stable_kgram_hashes(words, kgram_size), window_size)
+
+
+def build_index(fingerprints_list: List[Set[int]]) -> Dict[int, List[int]]:
+    """Return inverted index mapping each fingerprint to the increasing indices of files having it"""
+
+    index: Dict[int, List[int]] = {}
+
+    for file_ind, fingerprints in enumerate(fingerprints_list):
+        for fingerprint in fingerprints:
+            index.setdefault(fingerprint, []).append(file_ind)
+
+    return index
+
+
+def count_shared_fingerprints(index: Dict[int, List[int]]) -> Dict[Tuple[int, int], int]:
+    """Return number of fingerprints shared by each unordered pair (i, j) with i < j sharing any"""
+
+    shared: Dict[Tuple[int, int], int] = {}
+
+    for files in index.values():
+        for pair in combinations(files, 2):
+            shared[pair] = shared.get(pair, 0) + 1
+
+    return shared
+
+
+def fingerprints_scores(
+    processed_files: list, kgram_size: int = 5, window_size: int = 4
+) -> Dict[Tuple[int, int], float]:
+    """Return similarity percentage of each unordered pair (i, j) with i < j sharing fingerprints
+
+    The percentage is twice the number of shared fingerprints over the total number of
+    fingerprints of both files, like the Sequence Matcher ratio. Pairs sharing no fingerprint
+    are left out and have a similarity of 0.
+
+    """
+
+    fingerprints_list = [winnow(get_kgram_hashes(words, kgram_size), window_size) for words in processed_files]
+    shared = count_shared_fingerprints(build_index(fingerprints_list))
+
+    return {
+        (i, j): round(2.0 * count / (len(fingerprints_list[i]) + len(fingerprints_list[j])) * 100, 3)
+        for (i, j), count in shared.items()
+    }
@@ -11,15 +11,12 @@ setup(
     version=get_version(),
     packages=find_packages(),
     install_requires=[
-        "beautifulsoup4==4.10.0",
         "nltk==3.6.6",
-        "odfpy==1.4.1",
-        "tabulate==0.8.9",
         "tqdm==4.66.3",
         "pdfminer.six==20200517",
     ],
     extras_require={
-        "lint": ["pylint==3.0.2", "mypy==1.7.1", "flake8==6.1.0", "black==24.3.0", "types-tabulate"],
+        "lint": ["pylint==3.0.2", "mypy==1.7.1", "flake8==6.1.0", "black==24.3.0"],
         "dev": ["pytest", "pre-commit"],
     },
     author="Clément Delteil",
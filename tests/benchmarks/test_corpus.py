@@ -0,0 +1,45 @@
+import tempfile
+import unittest
+
+from benchmarks.corpus import FORMATS, generate_corpus, generate_texts
+from benchmarks.run import compare_with_baseline
+from scripts.processing_files import file_extension_call
+
+
+class TestCorpus(unittest.TestCase):
+    """
+    Tests corpus.py
+    """
+
+    def test_generate_texts(self):
+        """
+        Tests generate_texts() copies runs of words at the plagiarism rate
+        """
+        original = generate_texts(3, 200, 0.0)
+        copied = generate_texts(3, 200, 1.0)
+
+        self.assertEqual([len(words) for words in original], [200, 200, 200])
+        self.assertEqual(generate_texts(3, 200, 0.0), original)  # Same seed, same texts
+        self.assertNotEqual(original[0][:20], original[1][:20])
+        # With a rate of 1, every run of later texts comes from an earlier text
+        self.assertTrue(set(copied[2]) <= set(copied[0]))
+
+    def test_generate_corpus_extracts_generated_words(self):
+        """
+        Tests generate_corpus() writes files of each format whose extracted words are the generated ones
+        """
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            files_paths = generate_corpus(corpus_dir, 4, 1300, 0.5)
+
+            self.assertEqual([file.rsplit(".", 1)[1] for file in files_paths], list(FORMATS))
+            for file, words in zip(files_paths, generate_texts(4, 1300, 0.5)):
+                self.assertEqual(file_extension_call(file), words)
+
+    def test_compare_with_baseline(self):
+        """
+        Tests compare_with_baseline() only reports stages slower than the tolerance
+        """
+        timings = {"alignment": 1.2, "comparison_pages": 1.3, "results_table": 1.0}
+        baseline = {"alignment": 1.0, "comparison_pages": 1.0}
+
+        self.assertEqual(compare_with_baseline(timings, baseline, 0.25), ["comparison_pages"])
@@ -0,0 +1,67 @@
+import difflib
+import unittest
+from random import Random
+from unittest.mock import patch
+
+from scripts.anchoring import get_anchor_blocks, get_anchored_matching_blocks, get_anchors, select_anchors
+
+
+class TestAnchoring(unittest.TestCase):
+    """
+    Tests anchoring.py
+    """
+
+    def test_get_anchors(self):
+        """
+        Tests get_anchors() only keeps n-grams appearing once in each text
+        """
+        text1 = "a b c a b d".split()
+        text2 = "a b d c a b".split()
+
+        self.assertEqual(get_anchors(text1, text2, 2), [(2, 3), (4, 1)])
+
+    def test_select_anchors(self):
+        """
+        Tests select_anchors()
+        """
+        self.assertEqual(select_anchors([(0, 5), (1, 1), (2, 2), (3, 0), (4, 3)]), [(1, 1), (2, 2), (4, 3)])
+        self.assertEqual(select_anchors([]), [])
+
+    def test_get_anchor_blocks(self):
+        """
+        Tests get_anchor_blocks() merges anchors of the same diagonal and drops overlapping ones
+        """
+        self.assertEqual(get_anchor_blocks([(0, 0), (1, 1), (2, 5), (3, 6), (9, 9)], 3), [(0, 0, 4), (9, 9, 3)])
+
+    def test_same_blocks_as_difflib(self):
+        """
+        Tests get_anchored_matching_blocks() on texts where the longest blocks are unique
+        """
+        text1 = "the quick brown fox jumps over the lazy dog".split()
+        text2 = "a quick brown fox leaps over the lazy cat".split()
+
+        self.assertEqual(
+            get_anchored_matching_blocks(text1, text2, 3),
+            difflib.SequenceMatcher(a=text1, b=text2).get_matching_blocks(),
+        )
+
+    def test_blocks_are_consistent(self):
+        """
+        Tests get_anchored_matching_blocks() returns increasing and non overlapping matches
+        """
+        rng = Random(0)
+
+        for window_cells in (10, 4000000):
+            with patch("scripts.anchoring.MAX_WINDOW_CELLS", window_cells):
+                for _ in range(100):
+                    text1 = [rng.randint(0, 4) for _ in range(rng.randint(0, 40))]
+                    text2 = [rng.randint(0, 4) for _ in range(rng.randint(0, 40))] + text1[5:30]
+                    blocks = get_anchored_matching_blocks(text1, text2, 3)
+
+                    self.assertEqual(blocks[-1], (len(text1), len(text2), 0))
+                    end1 = end2 = 0
+                    for block in blocks[:-1]:
+                        self.assertEqual(text1[block.a : block.a + block.size], text2[block.b : block.b + block.size])
+                        self.assertGreaterEqual(block.a, end1)
+                        self.assertGreaterEqual(block.b, end2)
+                        end1, end2 = block.a + block.size, block.b + block.size
@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+from os import listdir, path, remove
+from unittest.mock import patch
+
+from scripts.archive import ArchiveIndex
+
+SETTINGS = {"kgram_size": 3, "window_size": 2}
+
+TEXTS = {
+    "a.txt": "the quick brown fox jumps over the lazy dog near the river bank",
+    "b.txt": "a completely different text about cooking pasta with fresh tomatoes",
+    "c.txt": "some words then the quick brown fox jumps over the lazy cat",
+}
+
+
+class TestArchive(unittest.TestCase):
+    """
+    Tests archive.py
+    """
+
+    def write_archive(self, archive_dir, texts):
+        """
+        Writes texts as txt files of archive_dir and returns their paths.
+        """
+        files_paths = []
+        for name, text in texts.items():
+            files_paths.append(path.join(archive_dir, name))
+            with open(files_paths[-1], "w", encoding="utf-8") as file:
+                file.write(text)
+
+        return files_paths
+
+    def test_query(self):
+        """
+        Tests ArchiveIndex query() ranks archived files sharing fingerprints with the queried words
+        """
+        with tempfile.TemporaryDirectory() as archive_dir, tempfile.TemporaryDirectory() as index_dir:
+            index = ArchiveIndex(index_dir)
+            self.assertEqual(index.update(self.write_archive(archive_dir, TEXTS), SETTINGS), 3)
+            index.close()
+
+            index = ArchiveIndex(index_dir)
+            matches = index.query(TEXTS["a.txt"].split(), top=2)
+            self.assertEqual([name for name, _, _ in matches], ["a.txt", "c.txt"])
+            self.assertEqual(matches[0][2], 100.0)
+            self.assertEqual(index.get_words(matches[1][1]), TEXTS["c.txt"].split())
+            self.assertEqual(index.query("nothing in common at all".split()), [])
+            index.close()
+
+    def test_update(self):
+        """
+        Tests ArchiveIndex update() only indexes new or changed files and drops removed ones
+        """
+        with tempfile.TemporaryDirectory() as archive_dir, tempfile.TemporaryDirectory() as index_dir:
+            index = ArchiveIndex(index_dir)
+            files_paths = self.write_archive(archive_dir, TEXTS)
+            index.update(files_paths, SETTINGS)
+
+            remove(files_paths[1])
+            files_paths = self.write_archive(archive_dir, {"c.txt": "changed text", "d.txt": "new text"})
+            files_paths.insert(0, path.join(archive_dir, "a.txt"))
+
+            self.assertEqual(index.update(files_paths, SETTINGS), 2)
+            self.assertEqual(sorted(index.get_documents()), ["a.txt", "c.txt", "d.txt"])
+            self.assertEqual(len(listdir(index.words.directory)), 3)
+            self.assertEqual([name for name, _, _ in index.query("changed text".split())], ["c.txt"])
+
+            # Files of unsupported formats are skipped instead of stopping the update
+            files_paths += self.write_archive(archive_dir, {"notes_txt": "some notes"})
+            with patch("builtins.print"):
+                self.assertEqual(index.update(files_paths, SETTINGS), 0)
+            self.assertEqual(sorted(index.get_documents()), ["a.txt", "c.txt", "d.txt"])
+
+            # Fingerprints of other settings cannot be compared, all files are indexed again
+            self.assertEqual(index.update(files_paths, {**SETTINGS, "kgram_size": 2}), 3)
+            index.close()
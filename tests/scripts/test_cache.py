@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from os import listdir, utime
+
+from difflib import Match
+
+from scripts.cache import DiskCache, PairsCache, WordsCache, decode_words, encode_words, get_pair_cache_key
+
+
+class TestCache(unittest.TestCase):
+    """
+    Tests cache.py
+    """
+
+    def test_encode_decode_words(self):
+        """
+        Tests encode_words() and decode_words()
+        """
+        words = ["plagiarism", "détection", "42"]
+        self.assertEqual(decode_words(encode_words(words)), words)
+        self.assertEqual(decode_words(encode_words([])), [])
+
+    def test_words_cache(self):
+        """
+        Tests WordsCache get_words() and put_words()
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = WordsCache(cache_dir, 1024)
+            self.assertIsNone(cache.get_words("key"))
+            cache.put_words("key", ["some", "words"])
+            self.assertEqual(cache.get_words("key"), ["some", "words"])
+
+    def test_pairs_cache(self):
+        """
+        Tests PairsCache get_pair() and put_pair()
+        """
+        blocks = [Match(1, 1, 3), Match(5, 5, 3)]
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = PairsCache(cache_dir, 1024)
+            key = get_pair_cache_key("a-txt-v1", "b-txt-v1", 2, "difflib")
+            self.assertIsNone(cache.get_pair(key))
+            cache.put_pair(key, 66.667, blocks)
+            self.assertEqual(cache.get_pair(key), (66.667, blocks))
+
+        # Order of files and alignment settings are part of the key
+        self.assertNotEqual(key, get_pair_cache_key("b-txt-v1", "a-txt-v1", 2, "difflib"))
+        self.assertNotEqual(key, get_pair_cache_key("a-txt-v1", "b-txt-v1", 3, "difflib"))
+        self.assertNotEqual(key, get_pair_cache_key("a-txt-v1", "b-txt-v1", 2, "suffix"))
+
+    def test_evict_least_recently_used(self):
+        """
+        Tests DiskCache evict() removes least recently used entries first
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = DiskCache(cache_dir, 20)
+            for age, key in enumerate(["old", "used", "new"]):
+                cache.put(key, b"0123456789")
+                utime(cache.entry_path(key), (age, age))
+
+            cache.get("old")  # Reading an entry makes it the most recently used
+            cache.evict()
+
+            self.assertEqual(sorted(listdir(cache_dir)), ["new.cache", "old.cache"])
@@ -0,0 +1,66 @@
+import tempfile
+import unittest
+from os import listdir, path
+
+from scripts.checkpoint import CHECKPOINT_FILE, Checkpoint
+
+HEADER = {"files": [("a", "key_a"), ("b", "key_b"), ("c", "key_c")], "settings": {"block_size": 2}}
+
+
+class TestCheckpoint(unittest.TestCase):
+    """
+    Tests checkpoint.py
+    """
+
+    def test_restore_compared_pairs(self):
+        """
+        Tests Checkpoint restore() returns pairs of an interrupted run having their comparison file
+        """
+        with tempfile.TemporaryDirectory() as results_dir:
+            checkpoint = Checkpoint(results_dir, HEADER)
+            checkpoint.start({})
+            checkpoint.add_pair(0, 1, 42.0, True, False)
+            checkpoint.add_pair(0, 2, 3.5, False, True)
+            checkpoint.add_pair(1, 2, 60.0, True, False)
+            checkpoint.close()
+
+            with open(path.join(results_dir, "0.html"), "w", encoding="utf-8"):
+                pass  # Comparison file of pair (1, 2) is missing
+            with open(path.join(results_dir, CHECKPOINT_FILE), "a", encoding="utf-8") as checkpoint_file:
+                checkpoint_file.write('{"i": 1, "j"')  # Line cut when the run was killed
+
+            restored = Checkpoint(results_dir, HEADER).restore(3)
+
+            self.assertEqual(restored, {(0, 1): (42.0, True, False), (0, 2): (3.5, False, True)})
+
+            # The checkpoint is started again from the restored pairs only
+            checkpoint = Checkpoint(results_dir, HEADER)
+            checkpoint.start(restored)
+            checkpoint.close()
+            self.assertEqual(Checkpoint(results_dir, HEADER).restore(3), restored)
+
+    def test_other_run_is_not_restored(self):
+        """
+        Tests Checkpoint restore() ignores a checkpoint of other files or settings
+        """
+        with tempfile.TemporaryDirectory() as results_dir:
+            checkpoint = Checkpoint(results_dir, HEADER)
+            checkpoint.start({})
+            checkpoint.add_pair(0, 2, 3.5, False, False)
+            checkpoint.close()
+
+            self.assertEqual(Checkpoint(results_dir, {**HEADER, "settings": {"block_size": 3}}).restore(3), {})
+            self.assertEqual(Checkpoint(results_dir, HEADER).restore(3), {(0, 2): (3.5, False, False)})
+
+    def test_remove(self):
+        """
+        Tests Checkpoint remove() closes and removes the checkpoint file of a complete run
+        """
+        with tempfile.TemporaryDirectory() as results_dir:
+            checkpoint = Checkpoint(results_dir, HEADER)
+            checkpoint.start({})
+            checkpoint.add_pair(0, 1, 42.0, False, False)
+            checkpoint.remove()
+
+            self.assertEqual(listdir(results_dir), [])
+            self.assertEqual(Checkpoint(results_dir, HEADER).restore(3), {})
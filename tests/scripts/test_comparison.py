@@ -0,0 +1,136 @@
+import tempfile
+import unittest
+from os import listdir, path
+from unittest.mock import patch
+
+from scripts.cache import PairsCache
+from scripts.comparison import compare_files, profile_pairs
+from scripts.metrics import RunMetrics
+from scripts.vocabulary import Vocabulary
+
+
+class TestComparison(unittest.TestCase):
+    """
+    Tests comparison.py
+    """
+
+    def setUp(self):
+        """
+        Sets up small texts to compare.
+        """
+        self.vocabulary = Vocabulary()
+        self.texts = [
+            self.vocabulary.encode(text.split())
+            for text in (
+                "the quick brown fox jumps over the lazy dog",
+                "a quick brown fox leaps over the lazy cat",
+                "nothing in common with the others here",
+            )
+        ]
+        self.names = ["first", "second", "third"]
+
+    def test_compare_files_parallel_matches_serial(self):
+        """
+        Tests compare_files() gives the same scores and pages with one or several jobs
+        """
+        with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as parallel_dir:
+            serial = sorted(compare_files(self.texts, self.vocabulary, self.names, serial_dir, 2, jobs=1))
+            parallel = sorted(compare_files(self.texts, self.vocabulary, self.names, parallel_dir, 2, jobs=2))
+
+            self.assertEqual(serial, parallel)
+            self.assertEqual([(i, j) for i, j, _ in serial], [(0, 1), (0, 2), (1, 2)])
+            self.assertEqual(sorted(listdir(serial_dir)), ["0.html", "1.html", "2.html"])
+
+            for page in listdir(serial_dir):
+                with open(path.join(serial_dir, page), encoding="utf-8") as f1, open(
+                    path.join(parallel_dir, page), encoding="utf-8"
+                ) as f2:
+                    self.assertEqual(f1.read(), f2.read())
+
+    def test_compare_files_pages_show_words(self):
+        """
+        Tests compare_files() writes decoded words in comparison pages
+        """
+        with tempfile.TemporaryDirectory() as results_dir:
+            list(compare_files(self.texts, self.vocabulary, self.names, results_dir, 2))
+
+            with open(path.join(results_dir, "0.html"), encoding="utf-8") as page:
+                self.assertIn("quick brown fox", page.read())
+
+    def test_compare_files_reuses_pairs_cache(self):
+        """
+        Tests compare_files() scores identical files 100 and does not align cached pairs again
+        """
+        texts = self.texts + [self.texts[0]]
+        keys = ["k1", "k2", "k3", "k1"]
+
+        with tempfile.TemporaryDirectory() as results_dir, tempfile.TemporaryDirectory() as cache_dir:
+            cache = PairsCache(cache_dir, 1 << 20)
+            names = self.names + ["copy"]
+            first = sorted(
+                compare_files(texts, self.vocabulary, names, results_dir, 2, files_keys=keys, pairs_cache=cache)
+            )
+
+            # Identical files are not stored, the other pairs are
+            self.assertEqual(first[2], (0, 3, 100.0))
+            self.assertEqual(len(listdir(cache_dir)), 5)
+
+            with patch("scripts.comparison.ENGINES", {}):  # Any alignment would fail
+                second = sorted(
+                    compare_files(texts, self.vocabulary, names, results_dir, 2, files_keys=keys, pairs_cache=cache)
+                )
+
+            self.assertEqual(first, second)
+
+    def test_compare_files_records_timings(self):
+        """
+        Tests compare_files() records timings of each pair and profile_pairs() dumps statistics without writing pages
+        """
+        metrics = RunMetrics()
+
+        with tempfile.TemporaryDirectory() as results_dir:
+            list(compare_files(self.texts, self.vocabulary, self.names, results_dir, 2, jobs=2, metrics=metrics))
+            self.assertEqual(sorted(metrics.pairs), [(0, 1), (0, 2), (1, 2)])
+
+        with tempfile.TemporaryDirectory() as profiles_dir:
+            profile_pairs([(1, 2)], profiles_dir, self.texts, self.vocabulary, self.names, 2, min_score=50)
+            self.assertEqual(listdir(profiles_dir), ["profile_2.prof"])
+
+    def test_compare_files_min_score(self):
+        """
+        Tests compare_files() only writes pages of pairs reaching the minimum score
+        """
+        without_page = {}
+
+        with tempfile.TemporaryDirectory() as results_dir:
+            results = sorted(
+                compare_files(
+                    self.texts, self.vocabulary, self.names, results_dir, 2, min_score=50.0, without_page=without_page
+                )
+            )
+
+            self.assertEqual(listdir(results_dir), ["0.html"])
+
+        # Pairs sharing only one word are rejected without alignment, their score is a bound
+        self.assertEqual(without_page, {(0, 2): True, (1, 2): True})
+        self.assertEqual(results[1], (0, 2, round(200 * 1 / 16, 3)))
+
+        # Same words in reverse order, the pair is aligned but scores below the minimum
+        reversed_texts = [self.vocabulary.encode("a b c d".split()), self.vocabulary.encode("d c b a".split())]
+        without_page = {}
+
+        with tempfile.TemporaryDirectory() as results_dir:
+            list(
+                compare_files(
+                    reversed_texts,
+                    self.vocabulary,
+                    self.names[:2],
+                    results_dir,
+                    1,
+                    min_score=50.0,
+                    without_page=without_page,
+                )
+            )
+            self.assertEqual(listdir(results_dir), [])
+
+        self.assertEqual(without_page, {(0, 1): False})
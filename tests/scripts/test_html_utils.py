@@ -0,0 +1,33 @@
+import unittest
+from difflib import Match
+
+from scripts.html_utils import get_ordered_blocks_positions, get_words_offsets
+
+
+class TestHtmlUtils(unittest.TestCase):
+    """
+    Tests html_utils.py
+    """
+
+    def test_get_words_offsets(self):
+        """
+        Tests get_words_offsets()
+        """
+        words = ["a", "quick", "fox"]
+        offsets = get_words_offsets(words)
+
+        self.assertEqual(offsets, [0, 2, 8])
+        joined = " ".join(words)
+        self.assertEqual([joined[offset:].split(" ")[0] for offset in offsets], words)
+
+    def test_get_ordered_blocks_positions(self):
+        """
+        Tests get_ordered_blocks_positions()
+        """
+        text1 = "brown fox and the brown fox".split()
+        text2 = "the brown fox".split()
+        blocks = [Match(a=3, b=0, size=3)]
+
+        # Only the matched occurrence is positioned, not the first "brown fox" of text1
+        self.assertEqual(get_ordered_blocks_positions(get_words_offsets(text1), blocks), [(14, 0)])
+        self.assertEqual(get_ordered_blocks_positions(get_words_offsets(text2), blocks, second_text=True), [(0, 0)])
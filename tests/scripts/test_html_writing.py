@@ -0,0 +1,122 @@
+import tempfile
+import unittest
+from os import path
+
+from scripts.html_writing import get_span_blocks, matches_to_html, papers_comparison, results_to_html
+
+
+class TestHtmlWriting(unittest.TestCase):
+    """
+    Tests html_writing.py
+    """
+
+    def test_get_span_blocks(self):
+        """
+        Tests get_span_blocks()
+        """
+        text1 = "the quick brown fox jumps".split()
+        text2 = "a quick brown fox".split()
+
+        left, right = get_span_blocks(text1, text2, 2, seed=0)
+
+        self.assertEqual([text for text, _ in left], ["the ", "quick brown fox", " jumps"])
+        self.assertEqual([text for text, _ in right], ["a ", "quick brown fox", ""])
+        # Matching block has the same color in both texts
+        self.assertIsNone(left[0][1])
+        self.assertEqual(left[1][1], right[1][1])
+        # Colors are reproducible with a seed
+        self.assertEqual(get_span_blocks(text1, text2, 2, seed=0), [left, right])
+
+    def test_papers_comparison(self):
+        """
+        Tests papers_comparison() writes escaped texts in both columns of the template
+        """
+        text1 = "x < y and b > c".split()
+        text2 = "x < y".split()
+
+        with tempfile.TemporaryDirectory() as save_dir:
+            papers_comparison(save_dir, 3, text1, text2, ("first & one", "second"), 2)
+
+            with open(path.join(save_dir, "3.html"), encoding="utf-8") as html:
+                page = html.read()
+
+        self.assertIn("<h3>first &amp; one</h3>", page)
+        self.assertIn("x &lt; y", page)
+        self.assertLess(page.index('id="leftContent"'), page.index("<h3>first"))
+        self.assertLess(page.index('id="rightContent"'), page.index("<h3>second"))
+        self.assertTrue(page.rstrip().endswith("</html>"))
+
+    def test_results_to_html(self):
+        """
+        Tests results_to_html() links both cells of a pair to the same comparison file
+        """
+        scores = [[-1, 20.5, 3.0], [20.5, -1, 0.5], [3.0, 0.5, -1]]
+
+        with tempfile.TemporaryDirectory() as save_dir:
+            html_path = path.join(save_dir, "_results.html")
+            results_to_html(scores, ["a", "b", "c"], html_path, compared_pairs={(0, 1), (0, 2)})
+
+            with open(html_path, encoding="utf-8") as html:
+                rows = html.read().split("<tr>")[1:]
+
+        self.assertIn("<td>a</td><td>b</td><td>c</td>", rows[0])
+        self.assertEqual(rows[1].count("0.html"), 1)
+        self.assertEqual(rows[2].count("0.html"), 1)
+        self.assertEqual(rows[3].count("1.html"), 1)
+        # Pair (1, 2) has no comparison file and diagonal cells are never linked
+        self.assertIn("<td>0.5</td>", rows[2])
+        self.assertIn("<td>-1</td>", rows[1])
+        self.assertIn("color:#990033", rows[1])
+
+    def test_results_to_html_metrics(self):
+        """
+        Tests results_to_html() writes a table without links for each metric
+        """
+        scores = [[-1, 20.5], [20.5, -1]]
+
+        with tempfile.TemporaryDirectory() as save_dir:
+            html_path = path.join(save_dir, "_results.html")
+            results_to_html(scores, ["a", "b"], html_path, metrics={"Jaccard similarity": [[-1, 0.25], [0.25, -1]]})
+
+            with open(html_path, encoding="utf-8") as html:
+                main_table, metric_table = html.read().split("<h3>Jaccard similarity</h3>")
+
+        self.assertEqual(main_table.count("0.html"), 2)
+        self.assertNotIn("href", metric_table)
+        self.assertEqual(metric_table.count("<td>0.25</td>"), 2)
+
+    def test_results_to_html_upper_bounds(self):
+        """
+        Tests results_to_html() writes upper bounds and estimates without links
+        """
+        scores = [[-1, 20.5, 3.0], [20.5, -1, 0.5], [3.0, 0.5, -1]]
+
+        with tempfile.TemporaryDirectory() as save_dir:
+            html_path = path.join(save_dir, "_results.html")
+            results_to_html(
+                scores, ["a", "b", "c"], html_path, compared_pairs={(0, 1)}, upper_bounds={(0, 2)}, estimates={(1, 2)}
+            )
+
+            with open(html_path, encoding="utf-8") as html:
+                rows = html.read().split("<tr>")[1:]
+
+        self.assertIn("<td>&le; 3.0</td>", rows[1])
+        self.assertIn("<td>&le; 3.0</td>", rows[3])
+        self.assertIn("<td>&asymp; 0.5</td>", rows[2])
+        self.assertIn("<td>&asymp; 0.5</td>", rows[3])
+
+    def test_matches_to_html(self):
+        """
+        Tests matches_to_html() links the similarity of each match to its comparison file
+        """
+        with tempfile.TemporaryDirectory() as save_dir:
+            html_path = path.join(save_dir, "_results.html")
+            matches_to_html("query", [("a.txt", 40.0, 35.5), ("b.pdf", 2.5, 1.0)], html_path)
+
+            with open(html_path, encoding="utf-8") as html:
+                rows = html.read().split("<tr>")[2:]
+
+        self.assertEqual(len(rows), 2)
+        self.assertIn("<td>a.txt</td><td>40.0</td>", rows[0])
+        self.assertIn("0.html", rows[0])
+        self.assertIn("1.html", rows[1])
@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from os import listdir, path
+
+from scripts.incremental import CorpusState
+
+SETTINGS = {"block_size": 2, "engine": "difflib"}
+
+
+class TestIncremental(unittest.TestCase):
+    """
+    Tests incremental.py
+    """
+
+    def write_pages(self, directory, count):
+        """
+        Writes comparison files named after their number and holding it.
+        """
+        for ind in range(count):
+            with open(path.join(directory, f"{ind}.html"), "w", encoding="utf-8") as page:
+                page.write(str(ind))
+
+    def test_restore_unchanged_pairs(self):
+        """
+        Tests CorpusState restore() keeps scores and renumbers comparison files of unchanged pairs
+        """
+        with tempfile.TemporaryDirectory() as state_dir:
+            state = CorpusState(state_dir, SETTINGS)
+            state.add_words("key_b", ["some", "words"])
+            state.add_words("key_c", ["other", "words"])
+            self.write_pages(state_dir, 1)
+            state.save(["b", "c"], ["key_b", "key_c"], [[-1, 42.0], [42.0, -1]], {(0, 1)})
+
+            # File a is added before both files, pair (b, c) becomes pair (1, 2) with number 2
+            state = CorpusState(state_dir, SETTINGS)
+            self.assertEqual(state.get_words("b", "key_b"), ["some", "words"])
+            self.assertIsNone(state.get_words("b", "changed_key"))
+
+            restored = state.restore(["a", "b", "c"], ["key_a", "key_b", "key_c"])
+
+            self.assertEqual(restored, {(1, 2): (42.0, True, False)})
+            self.assertEqual(sorted(listdir(state_dir)), ["2.html", "state.json", "words"])
+            with open(path.join(state_dir, "2.html"), encoding="utf-8") as page:
+                self.assertEqual(page.read(), "0")
+
+    def test_settings_change_discards_state(self):
+        """
+        Tests CorpusState ignores a state saved with other settings
+        """
+        with tempfile.TemporaryDirectory() as state_dir:
+            state = CorpusState(state_dir, SETTINGS)
+            state.save(["b", "c"], ["key_b", "key_c"], [[-1, 42.0], [42.0, -1]], set())
+
+            state = CorpusState(state_dir, {**SETTINGS, "block_size": 5})
+            self.assertEqual(state.restore(["b", "c"], ["key_b", "key_c"]), {})
+
+    def test_restore_stores_renumbered_state(self):
+        """
+        Tests CorpusState restore() stores the new numbers of comparison files before a run may be killed
+        """
+        with tempfile.TemporaryDirectory() as state_dir:
+            state = CorpusState(state_dir, SETTINGS)
+            self.write_pages(state_dir, 1)
+            state.save(["b", "c"], ["key_b", "key_c"], [[-1, 42.0], [42.0, -1]], {(0, 1)})
+            CorpusState(state_dir, SETTINGS).restore(["a", "b", "c"], ["key_a", "key_b", "key_c"])
+
+            # The run is killed before saving, its comparison file 0.html belongs to pair (a, b)
+            with open(path.join(state_dir, "0.html"), "w", encoding="utf-8") as page:
+                page.write("a b")
+            state = CorpusState(state_dir, SETTINGS)
+            self.assertEqual(state.files, {"b": "key_b", "c": "key_c"})
+
+            restored = state.restore(["a", "b", "c"], ["key_a", "key_b", "key_c"])
+
+            self.assertEqual(restored, {(1, 2): (42.0, True, False)})
+            self.assertEqual(sorted(listdir(state_dir)), ["2.html", "state.json", "words"])
+            with open(path.join(state_dir, "2.html"), encoding="utf-8") as page:
+                self.assertEqual(page.read(), "0")
+
+    def test_restore_kept_pages(self):
+        """
+        Tests CorpusState restore() keeps comparison files numbered in kept_pages
+        """
+        with tempfile.TemporaryDirectory() as state_dir:
+            state = CorpusState(state_dir, SETTINGS)
+            state.save(["b", "c"], ["key_b", "key_c"], [[-1, 42.0], [42.0, -1]], set())
+            self.write_pages(state_dir, 3)
+
+            # Comparison file 1.html of pair (a, c) was written by the interrupted run being resumed
+            state = CorpusState(state_dir, SETTINGS)
+            restored = state.restore(["a", "b", "c"], ["key_a", "key_b", "key_c"], {1})
+
+            self.assertEqual(restored, {(1, 2): (42.0, False, False)})
+            self.assertEqual(sorted(listdir(state_dir)), ["1.html", "state.json", "words"])
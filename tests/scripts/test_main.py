@@ -0,0 +1,18 @@
+import subprocess
+import sys
+import unittest
+
+
+class TestMain(unittest.TestCase):
+    """
+    Tests main.py
+    """
+
+    def test_import_skips_parsers(self):
+        """
+        Tests importing main does not import NLTK or the pdf and odt parsers
+        """
+        code = "import sys, scripts.main; print(' '.join(m for m in ('nltk', 'pdfminer', 'odf') if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True)
+
+        self.assertEqual(result.stdout.strip(), "")
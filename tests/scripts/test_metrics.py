@@ -0,0 +1,59 @@
+import json
+import tempfile
+import unittest
+from os import path
+
+from scripts.metrics import PairTimings, RunMetrics
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Tests metrics.py
+    """
+
+    def test_stage(self):
+        """
+        Tests RunMetrics stage() records wall and CPU times, even when the stage fails
+        """
+        metrics = RunMetrics()
+
+        with metrics.stage("extraction"):
+            sum(range(10000))
+
+        with self.assertRaises(ValueError), metrics.stage("comparison"):
+            raise ValueError
+
+        self.assertEqual(list(metrics.stages), ["extraction", "comparison"])
+        self.assertGreater(metrics.stages["extraction"]["wall"], 0)
+        self.assertGreaterEqual(metrics.stages["extraction"]["cpu"], 0)
+
+    def test_get_slowest_pairs(self):
+        """
+        Tests RunMetrics get_slowest_pairs() sorts pairs by alignment and rendering wall time
+        """
+        metrics = RunMetrics()
+        metrics.add_pair(0, 1, PairTimings(1.0, 1.0, 0.5, 0.5))
+        metrics.add_pair(0, 2, PairTimings(0.2, 0.2, 2.0, 2.0))
+        metrics.add_pair(1, 2, PairTimings(0.1, 0.1, 0.1, 0.1))
+
+        self.assertEqual(metrics.get_slowest_pairs(2), [(0, 2), (0, 1)])
+
+    def test_write(self):
+        """
+        Tests RunMetrics write() names files of pairs and sums pair timings
+        """
+        metrics = RunMetrics()
+        metrics.add_file("a", 100, 20)
+        metrics.add_file("b", 50, 10)
+        metrics.add_pair(0, 1, PairTimings(1.0, 0.5, 0.25, 0.25))
+
+        with tempfile.TemporaryDirectory() as metrics_dir:
+            metrics.write(path.join(metrics_dir, "metrics.json"))
+
+            with open(path.join(metrics_dir, "metrics.json"), encoding="utf-8") as metrics_file:
+                written = json.load(metrics_file)
+
+        self.assertEqual(written["pairs"][0]["files"], ["a", "b"])
+        self.assertEqual(written["pairs"][0]["words"], [20, 10])
+        self.assertEqual(written["pairs_totals"]["align_wall"], 1.0)
+        self.assertIn("self", written["peak_rss"])
@@ -0,0 +1,55 @@
+import unittest
+from random import Random
+
+from scripts.minhash import get_bands, get_min_xor, get_shingles, prune_pairs
+
+
+class TestMinhash(unittest.TestCase):
+    """
+    Tests minhash.py
+    """
+
+    def test_get_shingles(self):
+        """
+        Tests get_shingles()
+        """
+        words = "one two three four".split()
+        self.assertEqual(len(get_shingles(words, 2)), 3)
+        # Files shorter than a shingle still get one shingle
+        self.assertEqual(len(get_shingles(words, 10)), 1)
+
+    def test_get_min_xor(self):
+        """
+        Tests get_min_xor() finds the minimum of hashes XOR mask
+        """
+        rng = Random(3)
+
+        for _ in range(200):
+            hashes = sorted({rng.getrandbits(rng.choice((3, 32))) for _ in range(rng.randint(1, 50))})
+            mask = rng.getrandbits(32)
+            self.assertEqual(get_min_xor(hashes, mask), min(value ^ mask for value in hashes))
+
+    def test_get_bands(self):
+        """
+        Tests get_bands()
+        """
+        bands, rows = get_bands(128, 0.5, 0.95)
+        self.assertLessEqual(bands * rows, 128)
+        self.assertGreaterEqual(1 - (1 - 0.5**rows) ** bands, 0.95)
+        # Fewer rows would be needed to keep the same recall at a lower threshold
+        self.assertLess(get_bands(128, 0.2, 0.95)[1], rows)
+
+    def test_prune_pairs(self):
+        """
+        Tests prune_pairs() keeps similar pairs and estimates the others
+        """
+        base = [f"word{ind}" for ind in range(200)]
+        copy = base[:150] + [f"other{ind}" for ind in range(50)]
+        unrelated = [f"unrelated{ind}" for ind in range(200)]
+
+        candidates, estimates = prune_pairs([base, copy, unrelated], 0.5)
+
+        self.assertEqual(candidates, {(0, 1)})
+        self.assertEqual(set(estimates), {(0, 2), (1, 2)})
+        self.assertEqual(estimates[(0, 2)], 0.0)
+        self.assertEqual(prune_pairs([base, copy, unrelated], 0.5, jobs=2), (candidates, estimates))
@@ -0,0 +1,212 @@
+import io
+import tempfile
+import unittest
+import zipfile
+from os import path
+from unittest.mock import patch
+
+from scripts.cache import WordsCache
+from scripts.processing_files import (
+    extract_files,
+    extract_words,
+    get_cache_key,
+    get_words_from_docx_file,
+    get_words_from_odt_file,
+    get_words_from_txt_file,
+    iter_words_from_pdf_file,
+    iter_xml_texts,
+    try_get_cache_key,
+)
+
+SAMPLES_DIR = path.join(path.dirname(__file__), "..", "..", "data", "pdf", "pdf_tests")
+
+WORD_XMLNS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"'
+ODT_XMLNS = (
+    'xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:style="urn:oasis:names:tc:opendocument:xmlns:style:1.0" '
+    'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"'
+)
+
+
+def write_zip(zip_path: str, members: dict) -> None:
+    """Write members names and contents as a zip file"""
+
+    with zipfile.ZipFile(zip_path, "w") as archive:
+        for name, content in members.items():
+            archive.writestr(name, content)
+
+
+class TestProcessingFiles(unittest.TestCase):
+    """
+    Tests processing_files.py
+    """
+
+    def test_extract_words(self):
+        """
+        Tests extract_words()
+        """
+        sample = path.join(SAMPLES_DIR, "sample_txt.txt")
+        self.assertEqual(extract_words(sample), (sample, ["sample", "text"], None))
+
+    def test_extract_words_reports_failure(self):
+        """
+        Tests extract_words() returns an error instead of raising for a broken file
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            broken = path.join(tmp_dir, "broken.pdf")
+            with open(broken, "w", encoding="utf-8") as file:
+                file.write("not a pdf")
+
+            file, words, error = extract_words(broken)
+            self.assertEqual((file, words), (broken, []))
+            self.assertIsNotNone(error)
+
+    def test_try_get_cache_key(self):
+        """
+        Tests try_get_cache_key() returns the error of the extractor for a file whose format is not supported
+        """
+        sample = path.join(SAMPLES_DIR, "sample_txt.txt")
+        self.assertEqual(try_get_cache_key(sample), (get_cache_key(sample), None))
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            notes = path.join(tmp_dir, "notes_txt")
+            with open(notes, "w", encoding="utf-8") as file:
+                file.write("some notes")
+
+            key, error = try_get_cache_key(notes)
+            self.assertIsNone(key)
+            self.assertEqual(error, extract_words(notes)[2])
+
+    def test_extract_files_keeps_order(self):
+        """
+        Tests extract_files() yields files in the given order with several jobs
+        """
+        files = [path.join(SAMPLES_DIR, name) for name in ("sample_word.docx", "sample_txt.txt", "sample_word.pdf")]
+        serial = list(extract_files(files, jobs=1))
+
+        self.assertEqual([result[0] for result in serial], files)
+        self.assertEqual(list(extract_files(files, jobs=3)), serial)
+
+    def test_extract_words_from_cache(self):
+        """
+        Tests extract_words() reads words of an unchanged file from the cache
+        """
+        sample = path.join(SAMPLES_DIR, "sample_txt.txt")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = WordsCache(cache_dir, 1024)
+            self.assertEqual(extract_words(sample, cache)[1], ["sample", "text"])
+
+            cache.put_words(get_cache_key(sample), ["cached", "words"])
+            self.assertEqual(extract_words(sample, cache)[1], ["cached", "words"])
+
+    def test_extract_files_with_keys(self):
+        """
+        Tests extract_files() looks files up in the cache with the given keys instead of hashing them again
+        """
+        sample = path.join(SAMPLES_DIR, "sample_txt.txt")
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = WordsCache(cache_dir, 1024)
+            cache.put_words("known_key", ["cached", "words"])
+
+            with patch("scripts.processing_files.get_cache_key") as get_key:
+                self.assertEqual(
+                    list(extract_files([sample], 1, cache, keys=["known_key"])), [(sample, ["cached", "words"], None)]
+                )
+            get_key.assert_not_called()
+
+    def test_iter_words_from_pdf_file(self):
+        """
+        Tests iter_words_from_pdf_file() yields words page by page
+        """
+        sample = path.join(SAMPLES_DIR, "sample_word.pdf")
+        words = iter_words_from_pdf_file(sample, max_pages=1)
+
+        self.assertEqual(next(words), "sample")
+        self.assertEqual(list(words), ["word"])
+        self.assertNotEqual(get_cache_key(sample), get_cache_key(sample, pdf_max_pages=1))
+
+    def test_get_words_from_txt_file(self):
+        """
+        Tests get_words_from_txt_file() joins words and characters cut between chunks
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            txt_path = path.join(tmp_dir, "sample.txt")
+            with open(txt_path, "w", encoding="utf-8") as file:
+                file.write("Ünïcode words,\nsplit_across chunks é")
+
+            with patch("scripts.processing_files.TXT_CHUNK_SIZE", 3):
+                self.assertEqual(get_words_from_txt_file(txt_path), ["ünïcode", "words", "split_across", "chunks", "é"])
+
+            with open(txt_path, "w", encoding="utf-8"):
+                pass
+            self.assertEqual(get_words_from_txt_file(txt_path), [])
+
+    def test_iter_xml_texts(self):
+        """
+        Tests iter_xml_texts()
+        """
+        xml = b'<d xmlns="u"><p>one <t>tw</t><t>o</t></p><p><t>three</t><s/><t>four</t><p><t>nested</t></p></p></d>'
+
+        with patch("scripts.processing_files.XML_CHUNK_SIZE", 7):
+            texts = list(iter_xml_texts(io.BytesIO(xml), {"u t"}, {"u p"}, {"u s"}))
+
+        self.assertEqual(texts, ["two", "three four", "nested"])
+
+    def test_get_words_from_docx_file(self):
+        """
+        Tests get_words_from_docx_file() reads paragraphs, tables, notes and headers in order
+        """
+        document = (
+            f"<w:document {WORD_XMLNS}><w:body>"
+            "<w:p><w:r><w:t>Split</w:t></w:r><w:r><w:t>ted</w:t><w:tab/><w:t>run</w:t></w:r></w:p>"
+            "<w:p><w:r><w:instrText>PAGE</w:instrText><w:t>paragraph</w:t></w:r></w:p>"
+            "<w:tbl><w:tr><w:tc><w:p><w:r><w:t>cell</w:t></w:r></w:p></w:tc></w:tr></w:tbl>"
+            "</w:body></w:document>"
+        )
+        footnotes = (
+            f"<w:footnotes {WORD_XMLNS}><w:footnote><w:p><w:r><w:t>note</w:t></w:r></w:p></w:footnote></w:footnotes>"
+        )
+        header = f"<w:hdr {WORD_XMLNS}><w:p><w:r><w:t>Header</w:t></w:r></w:p></w:hdr>"
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            docx_path = path.join(tmp_dir, "sample.docx")
+            write_zip(
+                docx_path,
+                {"word/header1.xml": header, "word/document.xml": document, "word/footnotes.xml": footnotes},
+            )
+
+            self.assertEqual(
+                get_words_from_docx_file(docx_path), ["splitted", "run", "paragraph", "cell", "note", "header"]
+            )
+
+    def test_get_words_from_odt_file(self):
+        """
+        Tests get_words_from_odt_file() reads paragraphs, headings, tables, notes and headers in order
+        """
+        content = (
+            f"<office:document-content {ODT_XMLNS}><office:body><office:text>"
+            "<text:h>Title</text:h>"
+            "<text:p>Some<text:s/><text:span>styled</text:span> text"
+            "<text:note><text:note-citation>1</text:note-citation>"
+            "<text:note-body><text:p>note</text:p></text:note-body></text:note>end</text:p>"
+            "<table:table><table:table-row><table:table-cell><text:p>cell</text:p></table:table-cell>"
+            "</table:table-row></table:table>"
+            "</office:text></office:body></office:document-content>"
+        )
+        styles = (
+            f"<office:document-styles {ODT_XMLNS}><office:master-styles><style:master-page>"
+            "<style:header><text:p>Header</text:p></style:header>"
+            "</style:master-page></office:master-styles></office:document-styles>"
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            odt_path = path.join(tmp_dir, "sample.odt")
+            write_zip(odt_path, {"content.xml": content, "styles.xml": styles})
+
+            self.assertEqual(
+                get_words_from_odt_file(odt_path),
+                ["title", "some", "styled", "text", "1", "note", "end", "cell", "header"],
+            )
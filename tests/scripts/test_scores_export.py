@@ -0,0 +1,83 @@
+import ast
+import struct
+import tempfile
+import unittest
+from os import path
+
+from scripts.scores_export import get_part_path, write_scores
+
+SCORES = [[-1, 42.5], [42.5, -1]]
+
+
+class TestScoresExport(unittest.TestCase):
+    """
+    Tests scores_export.py
+    """
+
+    def test_write_scores_csv(self):
+        """
+        Tests write_scores() to a CSV file
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = path.join(tmp_dir, "scores.csv")
+            write_scores(csv_path, SCORES, ["a", "b"])
+
+            with open(csv_path, encoding="utf-8") as csv_file:
+                self.assertEqual(csv_file.read().splitlines(), [",a,b", "a,-1,42.5", "b,42.5,-1"])
+
+    def test_write_scores_npy(self):
+        """
+        Tests write_scores() to a .npy file
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            npy_path = path.join(tmp_dir, "scores.npy")
+            write_scores(npy_path, SCORES, ["a", "b"])
+
+            with open(npy_path, "rb") as npy_file:
+                content = npy_file.read()
+
+            self.assertEqual(content[:8], b"\x93NUMPY\x01\x00")
+            header_size = struct.unpack("<H", content[8:10])[0]
+            self.assertEqual((10 + header_size) % 64, 0)
+            header = ast.literal_eval(content[10 : 10 + header_size].decode("latin1"))
+            self.assertEqual(header, {"descr": "<f8", "fortran_order": False, "shape": (2, 2)})
+            self.assertEqual(list(struct.unpack("<4d", content[10 + header_size :])), [-1, 42.5, 42.5, -1])
+
+    def test_write_scores_estimates(self):
+        """
+        Tests write_scores() writes estimated scores to a separate file
+        """
+        scores = [[-1, 42.5, 3.0], [42.5, -1, 7.0], [3.0, 7.0, -1]]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = path.join(tmp_dir, "scores.csv")
+            write_scores(csv_path, scores, ["a", "b", "c"], {(0, 2), (1, 2)})
+
+            with open(csv_path, encoding="utf-8") as csv_file:
+                self.assertEqual(csv_file.read().splitlines(), [",a,b,c", "a,-1,42.5,", "b,42.5,-1,", "c,,,-1"])
+            with open(get_part_path(csv_path, "estimates"), encoding="utf-8") as csv_file:
+                self.assertEqual(csv_file.read().splitlines(), [",a,b,c", "a,,,3.0", "b,,,7.0", "c,3.0,7.0,"])
+
+    def test_write_scores_upper_bounds(self):
+        """
+        Tests write_scores() writes upper bounds of scores to a separate file
+        """
+        scores = [[-1, 42.5, 3.0], [42.5, -1, 7.0], [3.0, 7.0, -1]]
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = path.join(tmp_dir, "scores.csv")
+            write_scores(csv_path, scores, ["a", "b", "c"], {(0, 2)}, {(1, 2)})
+
+            with open(csv_path, encoding="utf-8") as csv_file:
+                self.assertEqual(csv_file.read().splitlines(), [",a,b,c", "a,-1,42.5,", "b,42.5,-1,", "c,,,-1"])
+            with open(get_part_path(csv_path, "estimates"), encoding="utf-8") as csv_file:
+                self.assertEqual(csv_file.read().splitlines(), [",a,b,c", "a,,,3.0", "b,,,", "c,3.0,,"])
+            with open(get_part_path(csv_path, "bounds"), encoding="utf-8") as csv_file:
+                self.assertEqual(csv_file.read().splitlines(), [",a,b,c", "a,,,", "b,,,7.0", "c,,7.0,"])
+
+    def test_write_scores_unsupported(self):
+        """
+        Tests write_scores() raises for other extensions
+        """
+        with self.assertRaises(ValueError):
+            write_scores("scores.txt", SCORES, ["a", "b"])
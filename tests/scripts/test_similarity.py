@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from scripts.similarity import (
+    anchored_alignment,
+    calculate_jaccard,
+    calculate_overlap,
+    difflib_alignment,
+    difflib_overlap,
+    get_ratio_upper_bound,
+    jaccard_matrix,
+    overlap_matrix,
+    suffix_alignment,
+)
+from scripts.utils import get_lemmatizer, get_stop_words
+from scripts.vocabulary import Vocabulary
+
+
+class FakeLemmatizer:
+    """Lemmatizer removing a final s, not needing NLTK data"""
+
+    def lemmatize(self, word):
+        return word[:-1] if word.endswith("s") else word
+
+
+class TestSimilarity(unittest.TestCase):
+    """
+    Tests similarity.py
+    """
+
+    def test_difflib_alignment(self):
+        """
+        Tests difflib_alignment()
+        """
+        text1 = "the quick brown fox jumps over the lazy dog".split()
+        text2 = "a quick brown fox leaps over the lazy cat".split()
+
+        score, blocks = difflib_alignment(text1, text2, 2)
+
+        # Score is the same as the one of difflib_overlap
+        self.assertEqual(score, difflib_overlap(text1, text2))
+        # Only blocks of minimum size are kept
+        self.assertEqual([(b.a, b.b, b.size) for b in blocks], [(1, 1, 3), (5, 5, 3)])
+
+    def test_suffix_alignment(self):
+        """
+        Tests suffix_alignment()
+        """
+        text1 = "the quick brown fox jumps over the lazy dog".split()
+        text2 = "a quick brown fox leaps over the lazy cat".split()
+
+        # Same ratio and blocks as difflib when no word is junk
+        self.assertEqual(suffix_alignment(text1, text2, 2), difflib_alignment(text1, text2, 2))
+        self.assertEqual(suffix_alignment([], [], 2), (100.0, []))
+
+    def test_anchored_alignment(self):
+        """
+        Tests anchored_alignment()
+        """
+        text1 = "the quick brown fox jumps over the lazy dog".split()
+        text2 = "a quick brown fox leaps over the lazy cat".split()
+
+        self.assertEqual(anchored_alignment(text1, text2, 2), difflib_alignment(text1, text2, 2))
+        self.assertEqual(anchored_alignment([], [], 2), (100.0, []))
+
+    def test_overlap_matrix(self):
+        """
+        Tests overlap_matrix()
+        """
+        texts = ["the cat sat on the mat".split(), "the dog sat".split(), "a cat and a dog".split()]
+        vocabulary = Vocabulary()
+        processed_files = [vocabulary.encode(text) for text in texts]
+
+        matrix = overlap_matrix(processed_files)
+
+        # Same asymmetric scores as calculate_overlap for every ordered pair
+        for i, text1 in enumerate(texts):
+            for j, text2 in enumerate(texts):
+                self.assertEqual(matrix[i][j], -1 if i == j else calculate_overlap(text1, text2))
+
+    def test_jaccard_matrix(self):
+        """
+        Tests jaccard_matrix()
+        """
+        texts = ["the cats sat on the mat".split(), "the cat sat".split(), "a cat and dogs".split(), ["the"]]
+        vocabulary = Vocabulary()
+        processed_files = [vocabulary.encode(text) for text in texts]
+        get_stop_words.cache_clear()
+        get_lemmatizer.cache_clear()
+
+        with patch("nltk.corpus.stopwords", Mock(words=Mock(return_value=["a", "the", "on", "and"]))), patch(
+            "nltk.stem.WordNetLemmatizer", FakeLemmatizer
+        ):
+            matrix = jaccard_matrix(processed_files, vocabulary)
+
+            # Same scores as calculate_jaccard, files without terms score 0
+            for i in range(3):
+                for j in range(3):
+                    self.assertEqual(matrix[i][j], -1 if i == j else calculate_jaccard(texts[i], texts[j]))
+            self.assertEqual(matrix[0][3], 0.0)
+
+        get_stop_words.cache_clear()
+        get_lemmatizer.cache_clear()
+
+    def test_get_ratio_upper_bound(self):
+        """
+        Tests get_ratio_upper_bound()
+        """
+        text1 = "the quick brown fox jumps over the lazy dog".split()
+        text2 = "a quick brown fox leaps over the lazy cat".split()
+
+        # Words shared counting repetitions bound the score of any alignment
+        self.assertEqual(get_ratio_upper_bound(text1, text2), round(200 * 6 / 18, 3))
+        self.assertGreaterEqual(get_ratio_upper_bound(text1, text2), difflib_overlap(text1, text2))
+        # Bound from lengths only when it is already below the minimum
+        self.assertEqual(get_ratio_upper_bound(text1, ["the"], 50.0), 20.0)
+        self.assertEqual(get_ratio_upper_bound([], []), 100.0)
@@ -0,0 +1,51 @@
+import difflib
+import unittest
+from random import Random
+
+from scripts.suffix_automaton import SuffixAutomaton, get_suffix_matching_blocks
+
+
+class TestSuffixAutomaton(unittest.TestCase):
+    """
+    Tests suffix_automaton.py
+    """
+
+    def test_get_longest_matches(self):
+        """
+        Tests SuffixAutomaton get_longest_matches()
+        """
+        automaton = SuffixAutomaton("a quick brown fox leaps".split())
+        matches = automaton.get_longest_matches("the quick brown fox jumps".split())
+
+        self.assertEqual(matches, [(1, 1, 3)])
+
+    def test_same_blocks_as_difflib(self):
+        """
+        Tests get_suffix_matching_blocks() on texts where the longest blocks are unique
+        """
+        text1 = "the quick brown fox jumps over the lazy dog".split()
+        text2 = "a quick brown fox leaps over the lazy cat".split()
+
+        self.assertEqual(
+            get_suffix_matching_blocks(text1, text2),
+            difflib.SequenceMatcher(a=text1, b=text2).get_matching_blocks(),
+        )
+
+    def test_blocks_are_consistent(self):
+        """
+        Tests get_suffix_matching_blocks() returns increasing and non overlapping matches
+        """
+        rng = Random(0)
+
+        for _ in range(100):
+            text1 = [rng.randint(0, 4) for _ in range(rng.randint(0, 30))]
+            text2 = [rng.randint(0, 4) for _ in range(rng.randint(0, 30))]
+            blocks = get_suffix_matching_blocks(text1, text2)
+
+            self.assertEqual(blocks[-1], (len(text1), len(text2), 0))
+            end1 = end2 = 0
+            for block in blocks[:-1]:
+                self.assertEqual(text1[block.a : block.a + block.size], text2[block.b : block.b + block.size])
+                self.assertGreaterEqual(block.a, end1)
+                self.assertGreaterEqual(block.b, end2)
+                end1, end2 = block.a + block.size, block.b + block.size
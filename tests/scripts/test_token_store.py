@@ -0,0 +1,73 @@
+import pickle
+import tempfile
+import unittest
+from array import array
+
+from scripts.comparison import compare_files
+from scripts.token_store import TokenStoreWriter
+from scripts.vocabulary import Vocabulary
+
+
+class TestTokenStore(unittest.TestCase):
+    """
+    Tests token_store.py
+    """
+
+    def test_write_read(self):
+        """
+        Tests TokenStore returns the appended arrays, including empty ones, and survives pickling
+        """
+        files = [array("i", [1, 2, 3]), array("i"), array("i", [4, 2])]
+
+        with tempfile.TemporaryDirectory() as store_dir:
+            writer = TokenStoreWriter(store_dir)
+            for word_ids in files:
+                writer.append(word_ids)
+            store = writer.close()
+
+            self.assertEqual(len(store), 3)
+            self.assertEqual([list(word_ids) for word_ids in store], [[1, 2, 3], [], [4, 2]])
+            self.assertEqual(list(store[-1][::-1]), [2, 4])
+            with self.assertRaises(IndexError):
+                store[3]  # pylint: disable=pointless-statement
+
+            copy = pickle.loads(pickle.dumps(store))
+            self.assertEqual(list(copy[0]), [1, 2, 3])
+
+            copy.close()
+            store.close()
+
+    def test_empty_store(self):
+        """
+        Tests TokenStore of files without words
+        """
+        with tempfile.TemporaryDirectory() as store_dir:
+            writer = TokenStoreWriter(store_dir)
+            writer.append(array("i"))
+            store = writer.close()
+
+            self.assertEqual(list(store[0]), [])
+            store.close()
+
+    def test_compare_files_from_store(self):
+        """
+        Tests compare_files() gives the same scores from a token store as from arrays in memory
+        """
+        vocabulary = Vocabulary()
+        texts = [
+            vocabulary.encode(text.split())
+            for text in ("the quick brown fox jumps", "a quick brown fox leaps", "nothing in common")
+        ]
+
+        with tempfile.TemporaryDirectory() as store_dir, tempfile.TemporaryDirectory() as results_dir:
+            writer = TokenStoreWriter(store_dir)
+            for word_ids in texts:
+                writer.append(word_ids)
+            store = writer.close()
+
+            names = ["first", "second", "third"]
+            expected = sorted(compare_files(texts, vocabulary, names, results_dir, 2))
+
+            self.assertEqual(sorted(compare_files(store, vocabulary, names, results_dir, 2, jobs=2)), expected)
+            self.assertEqual(sorted(compare_files(store, vocabulary, names, results_dir, 2)), expected)
+            store.close()
@@ -1,10 +1,13 @@
+import tempfile
 import unittest
+from os import path
 from unittest.mock import patch
 import nltk
 from scripts.utils import (
     parse_options,
     is_float,
-    wait_for_file,
+    get_pairs,
+    get_pair_index,
     remove_numbers,
     remove_stop_words,
     lemmatize,
@@ -36,6 +39,35 @@ class TestUtils(unittest.TestCase):
             self.assertEqual(args.out_dir, "output_dir")
             self.assertEqual(args.block_size, 5)
 
+    def test_parse_options_archive(self):
+        """
+        Tests parse_options() with archive options, which never depend on the name of the input directory
+        """
+        with patch("sys.argv", ["program", "index"]):
+            args = parse_options()
+            self.assertEqual((args.in_dir, args.index_archive, args.query), ("index", None, None))
+
+        with patch("sys.argv", ["program", "query.txt", "--query", "index_dir", "-k", "3"]):
+            args = parse_options()
+            self.assertEqual((args.in_dir, args.query, args.top), ("query.txt", "index_dir", 3))
+
+        with patch("sys.argv", ["program", "in", "--index_archive", "a", "--query", "b"]), patch("sys.stderr"):
+            with self.assertRaises(SystemExit):
+                parse_options()
+
+    def test_parse_options_resume(self):
+        """
+        Tests parse_options() rejects --resume without an existing output directory
+        """
+        with tempfile.TemporaryDirectory() as out_dir:
+            with patch("sys.argv", ["program", "input_dir", "-o", out_dir, "--resume"]):
+                self.assertTrue(parse_options().resume)
+
+            for test_args in (["--resume"], ["-o", path.join(out_dir, "missing"), "--resume"]):
+                with patch("sys.argv", ["program", "input_dir", *test_args]), patch("sys.stderr"):
+                    with self.assertRaises(SystemExit):
+                        parse_options()
+
     def test_is_float(self):
         """
         Tests is_float()
@@ -45,14 +77,6 @@ class TestUtils(unittest.TestCase):
         self.assertFalse(is_float(-1))
         self.assertFalse(is_float("not a float"))
 
-    def test_wait_for_file(self):
-        """
-        Tests wait_for_file()
-        """
-        # Test the wait_for_file function with a mock path.isfile
-        with patch("os.path.isfile", return_value=True):
-            self.assertTrue(wait_for_file("dummy_file"))
-
     def test_remove_numbers(self):
         """
         Tests remove_numbers()
@@ -101,3 +125,24 @@ class TestUtils(unittest.TestCase):
             words_list = ["running", "jumps"]
             expected = ["running_lemmatized", "jumps_lemmatized"]
             self.assertEqual(lemmatize(words_list), expected)
+
+    def test_get_pairs(self):
+        """
+        Tests get_pairs()
+        """
+        # Each unordered pair appears exactly once
+        self.assertEqual(get_pairs(3), [(0, 1), (0, 2), (1, 2)])
+        self.assertEqual(get_pairs(1), [])
+
+    def test_get_pair_index(self):
+        """
+        Tests get_pair_index()
+        """
+        # Index matches the position in get_pairs in both directions
+        for count in range(2, 7):
+            for ind, (i, j) in enumerate(get_pairs(count)):
+                self.assertEqual(get_pair_index(i, j, count), ind)
+                self.assertEqual(get_pair_index(j, i, count), ind)
+
+        with self.assertRaises(ValueError):
+            get_pair_index(1, 1, 3)
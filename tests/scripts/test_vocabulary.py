@@ -0,0 +1,29 @@
+import unittest
+
+from scripts.vocabulary import Vocabulary
+
+
+class TestVocabulary(unittest.TestCase):
+    """
+    Tests vocabulary.py
+    """
+
+    def test_encode_decode(self):
+        """
+        Tests Vocabulary encode() and decode()
+        """
+        vocabulary = Vocabulary()
+        words = ["to", "be", "or", "not", "to", "be"]
+        encoded = vocabulary.encode(words)
+
+        self.assertEqual(list(encoded), [0, 1, 2, 3, 0, 1])
+        self.assertEqual(encoded.itemsize, 4)
+        self.assertEqual(vocabulary.decode(encoded), words)
+        self.assertEqual(len(vocabulary), 4)
+
+    def test_shared_identifiers(self):
+        """
+        Tests words get the same identifiers in all encoded files
+        """
+        vocabulary = Vocabulary(["known"])
+        self.assertEqual(list(vocabulary.encode(["new", "known"])), [1, 0])
@@ -0,0 +1,64 @@
+import unittest
+
+from scripts.winnowing import (
+    build_index,
+    count_shared_fingerprints,
+    fingerprints_scores,
+    get_stable_fingerprints,
+    get_stable_kgram_hashes,
+    winnow,
+)
+
+
+class TestWinnowing(unittest.TestCase):
+    """
+    Tests winnowing.py
+    """
+
+    def test_winnow(self):
+        """
+        Tests winnow() keeps the rightmost minimum of each window
+        """
+        hashes = [77, 74, 42, 17, 98, 50, 17, 98, 8, 88, 67, 39, 77, 74, 42, 17, 98]
+        self.assertEqual(winnow(hashes, 4), {17, 8, 39})
+        self.assertEqual(winnow([5, 3], 4), {3})
+        self.assertEqual(winnow([], 4), set())
+
+    def test_count_shared_fingerprints(self):
+        """
+        Tests count_shared_fingerprints() from an inverted index
+        """
+        index = build_index([{1, 2, 3}, {2, 3}, {3, 4}])
+
+        self.assertEqual(index[3], [0, 1, 2])
+        self.assertEqual(count_shared_fingerprints(index), {(0, 1): 2, (0, 2): 1, (1, 2): 1})
+
+    def test_fingerprints_scores(self):
+        """
+        Tests fingerprints_scores() only scores pairs sharing fingerprints
+        """
+        base = list(range(100))
+        copy = list(range(100))
+        unrelated = list(range(1000, 1100))
+
+        scores = fingerprints_scores([base, copy, unrelated])
+
+        self.assertEqual(scores, {(0, 1): 100.0})
+
+    def test_get_stable_kgram_hashes(self):
+        """
+        Tests get_stable_kgram_hashes() hashes the text of k-grams with CRC32, the same on every platform
+        """
+        self.assertEqual(get_stable_kgram_hashes("a b c d".split(), 3), [3358461392, 271091860])
+        self.assertEqual(get_stable_kgram_hashes(["a", "b"], 3), [2154585299])
+
+    def test_get_stable_fingerprints(self):
+        """
+        Tests get_stable_fingerprints() depends on words only, not on their vocabulary identifiers
+        """
+        words = "the quick brown fox jumps over the lazy dog".split()
+        fingerprints = get_stable_fingerprints(words, 3, 2)
+
+        self.assertEqual(fingerprints, get_stable_fingerprints(list(words), 3, 2))
+        self.assertTrue(fingerprints & get_stable_fingerprints(["a", "cat"] + words[:5], 3, 2))
+        self.assertFalse(fingerprints & get_stable_fingerprints("a b c d e f".split(), 3, 2))